@@ -1,67 +1,61 @@
+import json
+import os
+from contextlib import nullcontext
+from datetime import date
+
 import streamlit as st
-import pandas as pd
-from data.data_loader import load_data
-from strategies.moving_average import moving_average_strategy
-from strategies.rsi import rsi_strategy
-from strategies.momentum import momentum_strategy
-from backtesting.backtester import backtest
-from visuals.plot_ma_strategy import plot_ma_strategy
-from visuals.plot_rsi_strategy import plot_rsi_strategy
-from visuals.plot_momentum_strategy import plot_momentum_strategy
-from visuals.plot_equity import plot_equity_curve
-
-def calculate_sharpe_ratio(returns, risk_free_rate=0.02):
-    """Calculate annualized Sharpe ratio"""
-    if len(returns) < 2:
-        return 0
-    excess_returns = returns - risk_free_rate / 252  # Daily risk-free rate
-    if excess_returns.std() == 0:
-        return 0
-    return excess_returns.mean() / excess_returns.std() * np.sqrt(252)
-
-def optimize_strategy(strategy_name, data, initial_capital, commission):
-    """Optimize strategy parameters using grid search"""
-    best_sharpe = -np.inf
-    best_params = {}
-    
+
+from profiling.profiler import profiling
+
+# Heavy modules (pandas, matplotlib, yfinance, the optimizers) are imported
+# where they are first needed, so the first paint after a restart only pays
+# for Streamlit itself.
+
+def optimize_strategy(strategy_name, data, initial_capital, commission, workers=None, progress=None):
+    """Optimize strategy parameters using a vectorized grid search spread across worker processes"""
+    from optimization.parallel import parallel_grid_search
+
+    best_params, best_sharpe, surface = parallel_grid_search(strategy_name, data, workers=workers, progress=progress,
+                                                             commission=commission)
+    return best_params, best_sharpe, surface
+
+def search_strategy(strategy_name, data, method, budget, seed, commission, progress=None):
+    """
+    Adaptive search over the full slider ranges; returns the triple plus the
+    backtests it ran and their cost in full-length backtests (the budget unit)
+    """
+    from optimization.adaptive import adaptive_search
+
+    result = adaptive_search(strategy_name, data, method, budget=budget, seed=seed, progress=progress,
+                             commission=commission)
+    return result.best_params, result.best_sharpe, result.surface, result.evaluations, result.cost
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_load_data(symbol, start, end):
+    """Market data for a symbol and date range, reused across reruns and sessions"""
+    from data.data_loader import load_data
+
+    return load_data(symbol, start, end)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_run_backtest(symbol, start, end, strategy_name, params, initial_capital, execution=()):
+    """Strategy result for fixed inputs; `params` and `execution` are tuples of (name, value) pairs"""
+    from backtesting.result import run_backtest
+
+    data = cached_load_data(symbol, start, end)
+    return run_backtest(data, strategy_name, dict(params), initial_capital=initial_capital, execution=dict(execution))
+
+def plot_strategy(strategy_name, results):
+    """Signal chart of a run; the plotting module (and matplotlib) is imported on first use"""
     if strategy_name == "Moving Average Crossover":
-        for short in range(5, 51, 5):
-            for long in range(short+5, 101, 10):
-                strategy_data = moving_average_strategy(data, short_window=short, long_window=long)
-                results = backtest(strategy_data, initial_capital, commission)
-                returns = results["Strategy_Returns"].dropna()
-                sharpe = calculate_sharpe_ratio(returns)
-                if sharpe > best_sharpe:
-                    best_sharpe = sharpe
-                    best_params = {"short_window": short, "long_window": long}
-                    
+        from visuals.plot_ma_strategy import plot_ma_strategy as plot_func
     elif strategy_name == "RSI Strategy":
-        for period in range(5, 51, 5):
-            for ob in range(65, 91, 5):
-                for os in range(10, 36, 5):
-                    strategy_data = rsi_strategy(data, rsi_period=period, overbought=ob, oversold=os)
-                    results = backtest(strategy_data, initial_capital, commission)
-                    returns = results["Strategy_Returns"].dropna()
-                    sharpe = calculate_sharpe_ratio(returns)
-                    if sharpe > best_sharpe:
-                        best_sharpe = sharpe
-                        best_params = {"rsi_period": period, "overbought": ob, "oversold": os}
-                        
-    elif strategy_name == "Momentum Strategy":
-        for lookback in range(5, 101, 10):
-            for thresh in np.arange(-0.05, 0.06, 0.01):
-                strategy_data = momentum_strategy(data, lookback_period=lookback, threshold=thresh)
-                results = backtest(strategy_data, initial_capital, commission)
-                returns = results["Strategy_Returns"].dropna()
-                sharpe = calculate_sharpe_ratio(returns)
-                if sharpe > best_sharpe:
-                    best_sharpe = sharpe
-                    best_params = {"lookback_period": lookback, "threshold": thresh}
-    
-    return best_params, best_sharpe
+        from visuals.plot_rsi_strategy import plot_rsi_strategy as plot_func
+    else:
+        from visuals.plot_momentum_strategy import plot_momentum_strategy as plot_func
+    return plot_func(results)
 
-import numpy as np
-from scipy import stats
+BACKTEST_COLUMNS = ("Position", "Returns", "Costs", "Strategy_Returns", "Portfolio", "Exit")
 
 # Top stocks list
 TOP_STOCKS = [
@@ -88,9 +82,9 @@ if symbol == "Other":
 
 col1, col2 = st.sidebar.columns(2)
 with col1:
-    start_date = st.date_input("Start Date", value=pd.to_datetime("2020-01-01"))
+    start_date = st.date_input("Start Date", value=date(2020, 1, 1))
 with col2:
-    end_date = st.date_input("End Date", value=pd.to_datetime("2024-01-01"))
+    end_date = st.date_input("End Date", value=date(2024, 1, 1))
 
 strategy = st.sidebar.selectbox("Trading Strategy", ["Moving Average Crossover", "RSI Strategy", "Momentum Strategy"])
 
@@ -112,193 +106,358 @@ initial_capital = st.sidebar.number_input("Initial Capital ($)", 10000, 1000000,
 
 commission = st.sidebar.slider("Transaction Commission (%)", 0.0, 1.0, 0.1, step=0.01, help="Commission per trade as percentage") / 100
 
-# Run button
-if st.sidebar.button("🚀 Run Backtest", type="primary"):
-    with st.spinner("Loading data and running backtest..."):
-        try:
-            # Load data
-            data = load_data(symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
-            
-            if data.empty:
-                st.error("No data found for the selected symbol and date range.")
-                st.stop()
+with st.sidebar.expander("Risk Management"):
+    st.caption("0 turns a rule off. Stops are checked on closes and exit at that close.")
+    slippage = st.slider("Slippage (%)", 0.0, 1.0, 0.0, step=0.01, help="Price impact per trade, charged like commission") / 100
+    stop_loss = st.slider("Stop Loss (%)", 0.0, 50.0, 0.0, step=0.5, help="Exit once price moves this far against the entry") / 100
+    take_profit = st.slider("Take Profit (%)", 0.0, 100.0, 0.0, step=0.5, help="Exit once price moves this far in favour of the entry") / 100
+    trailing_stop = st.slider("Trailing Stop (%)", 0.0, 50.0, 0.0, step=0.5, help="Exit once price falls this far from its best close since entry") / 100
+    target_vol = st.slider("Volatility Target (%)", 0.0, 100.0, 0.0, step=1.0, help="Size each entry to this annualized volatility") / 100
+    max_leverage = st.slider("Max Leverage", 0.5, 5.0, 1.0, step=0.5, help="Cap on the volatility-targeted position size")
+
+execution = {"commission": commission, "slippage": slippage}
+for name, value in (("stop_loss", stop_loss), ("take_profit", take_profit), ("trailing_stop", trailing_stop)):
+    if value > 0:
+        execution[name] = value
+if target_vol > 0:
+    execution.update(target_vol=target_vol, max_leverage=max_leverage)
+
+profile = st.sidebar.checkbox("Profile Runs", help="Time each pipeline stage and show the breakdown under Performance")
+track_memory = profile and st.sidebar.checkbox("Track Peak Memory", value=True, help="Also record peak memory per stage; slows profiled runs down")
+# A fresh profiler (or none) per rerun, closed however the run ends: st.stop(), an error or a rerun
+with profiling(memory=track_memory) if profile else nullcontext() as profiler:
+    if strategy == "Moving Average Crossover":
+        strategy_params = {"short_window": short_window, "long_window": long_window}
+    elif strategy == "RSI Strategy":
+        strategy_params = {"rsi_period": rsi_period, "overbought": overbought, "oversold": oversold}
+    elif strategy == "Momentum Strategy":
+        strategy_params = {"lookback_period": lookback_period, "threshold": threshold}
+
+    # Run button
+    if st.sidebar.button("🚀 Run Backtest", type="primary"):
+        with st.spinner("Loading data and running backtest..."):
+            try:
+                # Load data
+                start, end = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+                data = cached_load_data(symbol, start, end)
             
-            # Apply strategy
-            if strategy == "Moving Average Crossover":
-                strategy_data = moving_average_strategy(data, short_window=short_window, long_window=long_window)
-                plot_func = plot_ma_strategy
-            elif strategy == "RSI Strategy":
-                strategy_data = rsi_strategy(data, rsi_period=rsi_period, overbought=overbought, oversold=oversold)
-                plot_func = plot_rsi_strategy
-            elif strategy == "Momentum Strategy":
-                strategy_data = momentum_strategy(data, lookback_period=lookback_period, threshold=threshold)
-                plot_func = plot_momentum_strategy
+                if data.empty:
+                    st.error("No data found for the selected symbol and date range.")
+                    st.stop()
             
-            # Backtest
-            results = backtest(strategy_data, initial_capital=initial_capital, commission=commission)
+                # Apply strategy and backtest into one compact array-backed result
+                results = cached_run_backtest(symbol, start, end, strategy, tuple(strategy_params.items()), initial_capital,
+                                              tuple(execution.items()))
             
-            # Store in session state for persistence
-            st.session_state['strategy_data'] = strategy_data
-            st.session_state['results'] = results
-            st.session_state['plot_func'] = plot_func
-            st.session_state['data'] = data
-            st.session_state['strategy'] = strategy
-            st.session_state['initial_capital'] = initial_capital
-            st.session_state['commission'] = commission
+                # Store in session state for persistence; the optimizer only needs Close
+                st.session_state['results'] = results
+                st.session_state['data'] = data[["Close"]]
+                st.session_state['strategy'] = strategy
+                st.session_state['initial_capital'] = initial_capital
+                st.session_state['commission'] = commission
             
-            st.success("Backtest completed successfully!")
+                st.success("Backtest completed successfully!")
             
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
-            st.stop()
-
-# Display results if available
-if 'results' in st.session_state:
-    results = st.session_state['results']
-    strategy_data = st.session_state['strategy_data']
-    plot_func = st.session_state['plot_func']
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+                st.stop()
+
+    # Display results if available
+    if 'results' in st.session_state:
+        from metrics.performance import performance_metrics
+        from metrics.trades import trade_ledger, trade_stats
+
+        results = st.session_state['results']
     
-    # Metrics
-    st.header("📈 Performance Metrics")
-    col1, col2, col3, col4 = st.columns(4)
+        # Metrics
+        st.header("📈 Performance Metrics")
+        col1, col2, col3, col4 = st.columns(4)
     
-    final_portfolio = results["Portfolio"].iloc[-1]
-    initial_portfolio = results["Portfolio"].iloc[0]
-    total_return = (final_portfolio - initial_portfolio) / initial_portfolio * 100
+        final_portfolio = results["Portfolio"].iloc[-1]
+
+        # Return and risk metrics in a single pass over the strategy returns
+        metrics = performance_metrics(results["Strategy_Returns"])
+        total_return = metrics["total_return"] * 100
+        sharpe_ratio = metrics["sharpe"]
+        sortino_ratio = metrics["sortino"]
+        max_drawdown = metrics["max_drawdown"] * 100  # Convert to percentage
+        calmar_ratio = metrics["calmar"]
     
-    # Calculate Sharpe ratio (simplified)
-    returns = results["Strategy_Returns"].dropna()
-    if len(returns) > 0:
-        sharpe_ratio = returns.mean() / returns.std() * (252 ** 0.5) if returns.std() > 0 else 0
-    else:
-        sharpe_ratio = 0
+        # Win Rate and Profit Factor
+        trade_summary = trade_stats(results["Position"], results["Returns"])
+        win_rate = trade_summary["win_rate"]
+        profit_factor = trade_summary["profit_factor"]
+        total_trades = trade_summary["trades"]
+    
+        with col1:
+            st.metric("Final Portfolio Value", f"${final_portfolio:,.2f}")
+        with col2:
+            st.metric("Total Return", f"{total_return:.2f}%")
+        with col3:
+            st.metric("Max Drawdown", f"{max_drawdown:.2f}%")
+        with col4:
+            st.metric("Sharpe Ratio", f"{sharpe_ratio:.2f}")
     
-    # Additional metrics
-    portfolio_values = results["Portfolio"]
+        # Additional metrics in second row
+        col5, col6, col7, col8 = st.columns(4)
+        with col5:
+            st.metric("Win Rate", f"{win_rate:.1f}%")
+        with col6:
+            st.metric("Profit Factor", f"{profit_factor:.2f}")
+        with col7:
+            st.metric("Calmar Ratio", f"{calmar_ratio:.2f}")
+        with col8:
+            st.metric("Sortino Ratio", f"{sortino_ratio:.2f}")
     
-    # Maximum Drawdown
-    peak = portfolio_values.expanding().max()
-    drawdown = (portfolio_values - peak) / peak
-    max_drawdown = drawdown.min() * 100  # Convert to percentage
+        # Trade statistics
+        st.subheader("Trade Statistics")
+        col9, col10, col11, col12 = st.columns(4)
+        with col9:
+            st.metric("Total Trades", total_trades)
+        with col10:
+            st.metric("Avg Annual Return", f"{total_return * 252 / len(results):.2f}%")  # Rough estimate
+        with col11:
+            st.metric("Avg Win / Loss", f"{trade_summary['avg_win'] * 100:.2f}% / {trade_summary['avg_loss'] * 100:.2f}%")
+        with col12:
+            st.metric("Exposure", f"{trade_summary['exposure']:.1f}%")
+        if "Costs" in results:
+            from backtesting.execution import EXIT_REASONS
+
+            exits = results["Exit"].value_counts()
+            rule_exits = ", ".join(f"{count} {EXIT_REASONS[code].lower()}" for code, count in exits.items() if code)
+            st.caption(f"Transaction costs: {results['Costs'].sum() * 100:.2f}% of capital · "
+                       f"Rule exits: {rule_exits or 'none'}")
+        st.header("📊 Charts")
+        # Only the selected chart is generated on each rerun
+        chart = st.radio("Chart", ["Strategy Signals", "Equity Curve"], horizontal=True, label_visibility="collapsed")
     
-    # Win Rate and Profit Factor
-    trades = strategy_data["Signal"].diff().fillna(0)
-    trade_signals = trades[trades != 0]
-    if len(trade_signals) > 0:
-        # Calculate returns per trade (simplified)
-        trade_returns = []
-        entry_price = None
-        for idx, signal in trade_signals.items():
-            if signal == 1 and entry_price is None:  # Buy
-                entry_price = float(strategy_data.loc[idx, "Close"])
-            elif signal == -1 and entry_price is not None:  # Sell
-                exit_price = float(strategy_data.loc[idx, "Close"])
-                trade_return = (exit_price - entry_price) / entry_price
-                trade_returns.append(trade_return)
-                entry_price = None
-        
-        if trade_returns:
-            winning_trades = [r for r in trade_returns if r > 0]
-            losing_trades = [r for r in trade_returns if r < 0]
-            win_rate = len(winning_trades) / len(trade_returns) * 100
-            gross_profit = sum(winning_trades)
-            gross_loss = abs(sum(losing_trades))
-            profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-            total_trades = len(trade_returns)
+        from visuals.render import FIGURE_CACHE
+
+        if chart == "Strategy Signals":
+            fig1 = plot_strategy(st.session_state['strategy'], results)
+            # The figure may be cached and shown to another session at the same time
+            with FIGURE_CACHE.render_lock:
+                st.pyplot(fig1)
         else:
-            win_rate = 0
-            profit_factor = 0
-            total_trades = 0
-    else:
-        win_rate = 0
-        profit_factor = 0
-        total_trades = 0
+            from visuals.plot_equity import plot_equity_curve
+
+            fig2 = plot_equity_curve(results)
+            with FIGURE_CACHE.render_lock:
+                st.pyplot(fig2)
     
-    # Calmar Ratio
-    calmar_ratio = total_return / abs(max_drawdown) if max_drawdown != 0 else 0
+        # Data tables
+        st.header("📋 Data")
+        with st.expander("Strategy Data"):
+            st.dataframe(results.tail(20, [c for c in results.columns if c not in BACKTEST_COLUMNS]))
     
-    # Sortino Ratio (downside deviation)
-    downside_returns = returns[returns < 0]
-    if len(downside_returns) > 0:
-        sortino_ratio = returns.mean() / downside_returns.std() * (252 ** 0.5) if downside_returns.std() > 0 else 0
+        with st.expander("Backtest Results"):
+            st.dataframe(results.tail(20))
+
+        with st.expander("Trade Ledger"):
+            st.dataframe(trade_ledger(results["Position"], results["Returns"], results["Close"], results.index))
+
+        # Robustness analysis
+        st.header("🎲 Robustness")
+        st.markdown("Resample the strategy's returns to see how much the metrics above depend on this one historical path.")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            resampling = st.selectbox("Resampling", ["Block Bootstrap", "Trade Reordering"],
+                                      help="Block Bootstrap redraws blocks of consecutive bars; Trade Reordering shuffles the order of the same trades")
+        with col2:
+            n_samples = st.number_input("Resamples", 1000, 100000, 10000, step=1000)
+        with col3:
+            block_size = st.number_input("Block Size (bars)", 0, 252, 0, help="0 picks the cube root of the history")
+        with col4:
+            confidence = st.slider("Confidence (%)", 80, 99, 95) / 100
+
+        if st.button("🎲 Run Robustness Analysis", type="secondary"):
+            with st.spinner("Resampling returns..."):
+                try:
+                    from metrics.robustness import robustness_analysis
+
+                    progress_bar = st.progress(0.0)
+                    robustness = robustness_analysis(
+                        results["Strategy_Returns"], results["Position"], method=resampling, n_samples=int(n_samples),
+                        block_size=int(block_size) or None, confidence=confidence,
+                        progress=lambda done, total: progress_bar.progress(done / total, text=f"{done:,}/{total:,} resamples"),
+                    )
+                    progress_bar.empty()
+                    summary = robustness.summary
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Sharpe Ratio", f"{summary.loc['sharpe', 'Lower']:.2f} to {summary.loc['sharpe', 'Upper']:.2f}")
+                    with col2:
+                        st.metric("Max Drawdown", f"{summary.loc['max_drawdown', 'Lower'] * 100:.1f}% to {summary.loc['max_drawdown', 'Upper'] * 100:.1f}%")
+                    with col3:
+                        st.metric("Total Return", f"{summary.loc['total_return', 'Lower'] * 100:.1f}% to {summary.loc['total_return', 'Upper'] * 100:.1f}%")
+                    with col4:
+                        st.metric("Chance of a Loss", f"{robustness.prob_loss * 100:.1f}%")
+                    st.caption(f"{confidence:.0%} intervals over {int(n_samples):,} resamples")
+                    st.dataframe(summary.rename(index={"sharpe": "Sharpe Ratio", "max_drawdown": "Max Drawdown",
+                                                       "total_return": "Total Return"}))
+
+                    import numpy as np
+                    import pandas as pd
+
+                    # Reordering trades leaves Sharpe unchanged, so show the drawdowns instead
+                    shown = "max_drawdown" if resampling == "Trade Reordering" else "sharpe"
+                    counts, edges = np.histogram(robustness.samples[shown], bins=40)
+                    st.caption(f"Distribution of resampled {'max drawdowns' if shown == 'max_drawdown' else 'Sharpe ratios'}")
+                    st.bar_chart(pd.Series(counts, index=np.round((edges[:-1] + edges[1:]) / 2, 3)))
+                except Exception as e:
+                    st.error(f"Robustness analysis failed: {str(e)}")
+
     else:
-        sortino_ratio = 0
-    
-    with col1:
-        st.metric("Final Portfolio Value", f"${final_portfolio:,.2f}")
-    with col2:
-        st.metric("Total Return", f"{total_return:.2f}%")
-    with col3:
-        st.metric("Max Drawdown", f"{max_drawdown:.2f}%")
-    with col4:
-        st.metric("Sharpe Ratio", f"{sharpe_ratio:.2f}")
-    
-    # Additional metrics in second row
-    col5, col6, col7, col8 = st.columns(4)
-    with col5:
-        st.metric("Win Rate", f"{win_rate:.1f}%")
-    with col6:
-        st.metric("Profit Factor", f"{profit_factor:.2f}")
-    with col7:
-        st.metric("Calmar Ratio", f"{calmar_ratio:.2f}")
-    with col8:
-        st.metric("Sortino Ratio", f"{sortino_ratio:.2f}")
-    
-    # Trade statistics
-    st.subheader("Trade Statistics")
-    col9, col10 = st.columns(2)
-    with col9:
-        st.metric("Total Trades", total_trades)
-    with col10:
-        st.metric("Avg Annual Return", f"{total_return * 252 / len(results):.2f}%")  # Rough estimate
-    st.header("📊 Charts")
-    tab1, tab2 = st.tabs(["Strategy Signals", "Equity Curve"])
-    
-    with tab1:
-        fig1 = plot_func(strategy_data)
-        st.pyplot(fig1)
-    
-    with tab2:
-        fig2 = plot_equity_curve(results)
-        st.pyplot(fig2)
-    
-    # Data tables
-    st.header("📋 Data")
-    with st.expander("Strategy Data"):
-        st.dataframe(strategy_data.tail(20))
-    
-    with st.expander("Backtest Results"):
-        st.dataframe(results.tail(20))
+        st.info("Configure parameters in the sidebar and click 'Run Backtest' to get started.")
 
-else:
-    st.info("Configure parameters in the sidebar and click 'Run Backtest' to get started.")
+    # Optimization section
+    if 'results' in st.session_state:
+        st.header("⚡ Parameter Optimization")
+        st.markdown("Optimize strategy parameters to maximize Sharpe ratio using grid search, or search the full slider ranges adaptively.")
 
-# Optimization section
-if 'results' in st.session_state:
-    st.header("⚡ Parameter Optimization")
-    st.markdown("Optimize strategy parameters to maximize Sharpe ratio using grid search.")
+        search_method = st.selectbox(
+            "Search Method", ["Grid", "Random", "Successive Halving", "Surrogate Model"],
+            help="Grid scores a fixed coarse grid; the other methods sample the full slider ranges within a backtest budget",
+        )
+        cpu_count = os.cpu_count() or 1
+        workers = st.number_input("Worker Processes", 1, cpu_count, cpu_count, help="Number of CPU cores used for the grid search and walk-forward validation")
+        if search_method != "Grid":
+            col1, col2 = st.columns(2)
+            with col1:
+                budget = st.number_input("Backtest Budget", 8, 2000, 128, step=8, help="Full-length backtests the search may use")
+            with col2:
+                seed = st.number_input("Seed", 0, 2**31 - 1, 0, help="Same seed, same result")
     
-    if st.button("🚀 Optimize Parameters", type="secondary"):
-        with st.spinner("Optimizing parameters... This may take a moment."):
-            try:
-                data = st.session_state['data']  # Need to store data
-                strategy = st.session_state['strategy']
-                initial_capital = st.session_state['initial_capital']
-                commission = st.session_state['commission']
+        if st.button("🚀 Optimize Parameters", type="secondary"):
+            with st.spinner("Optimizing parameters... This may take a moment."):
+                try:
+                    progress_bar = st.progress(0.0)
+                    data = st.session_state['data']  # Need to store data
+                    strategy = st.session_state['strategy']
+                    initial_capital = st.session_state['initial_capital']
+                    commission = st.session_state['commission']
                 
-                best_params, best_sharpe = optimize_strategy(strategy, data, initial_capital, commission)
+                    if search_method == "Grid":
+                        best_params, best_sharpe, surface = optimize_strategy(
+                            strategy, data, initial_capital, commission, workers=workers,
+                            progress=lambda done, total: progress_bar.progress(done / total, text=f"{done}/{total} parameter sets"),
+                        )
+                        searched = f"{len(surface):,} backtests"
+                    else:
+                        best_params, best_sharpe, surface, evaluations, cost = search_strategy(
+                            strategy, data, search_method, int(budget), int(seed), commission,
+                            progress=lambda done, total: progress_bar.progress(done / total),
+                        )
+                        # Sub-period backtests count towards the budget by their share of the bars
+                        searched = f"{evaluations:,} backtests, {cost:,.0f} of {int(budget):,} budget"
                 
-                st.success(f"Optimization complete! Best Sharpe Ratio: {best_sharpe:.2f}")
-                st.subheader("Optimal Parameters:")
-                for param, value in best_params.items():
-                    st.write(f"**{param.replace('_', ' ').title()}:** {value}")
+                    st.success(f"Optimization complete! Best Sharpe Ratio: {best_sharpe:.2f} ({searched})")
+                    st.subheader("Optimal Parameters:")
+                    for param, value in best_params.items():
+                        st.write(f"**{param.replace('_', ' ').title()}:** {value}")
                     
-                # Store optimal params
-                st.session_state['optimal_params'] = best_params
+                    with st.expander("Score Surface"):
+                        st.dataframe(surface.sort_values("Sharpe", ascending=False))
+
+                    # Store optimal params
+                    st.session_state['optimal_params'] = best_params
                 
+                except Exception as e:
+                    st.error(f"Optimization failed: {str(e)}")
+
+        st.subheader("Walk-Forward Validation")
+        st.markdown("Re-optimize on each training window and trade the winner on the following out-of-sample window.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            train_size = st.number_input("Training Bars", 60, 2520, 504, step=21)
+        with col2:
+            test_size = st.number_input("Test Bars", 21, 504, 126, step=21)
+        with col3:
+            anchored = st.checkbox("Anchored Training Window", help="Always train from the first bar instead of a rolling window")
+
+        if st.button("🔁 Run Walk-Forward", type="secondary"):
+            with st.spinner("Running walk-forward optimization..."):
+                try:
+                    from optimization.walk_forward import walk_forward
+
+                    progress_bar = st.progress(0.0)
+                    walk_result = walk_forward(
+                        st.session_state['strategy'], st.session_state['data'], train_size=train_size,
+                        test_size=test_size, anchored=anchored, workers=workers,
+                        initial_capital=st.session_state['initial_capital'], commission=st.session_state['commission'],
+                        progress=lambda done, total: progress_bar.progress(done / total, text=f"{done}/{total} parameter sets"),
+                    )
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Out-of-Sample Return", f"{walk_result.metrics['total_return'] * 100:.2f}%")
+                    with col2:
+                        st.metric("Out-of-Sample Sharpe", f"{walk_result.metrics['sharpe']:.2f}")
+                    with col3:
+                        st.metric("Folds", len(walk_result.folds))
+                    st.line_chart(walk_result.equity)
+                    st.dataframe(walk_result.folds)
+                except Exception as e:
+                    st.error(f"Walk-forward failed: {str(e)}")
+
+    # Portfolio section
+    st.header("🌐 Portfolio Backtest")
+    st.markdown("Run the selected strategy across all top stocks as an equal-weight portfolio.")
+
+    if st.button("🚀 Run Portfolio Backtest", type="secondary"):
+        with st.spinner("Loading universe and running portfolio backtest..."):
+            try:
+                from backtesting.portfolio import backtest_portfolio
+                from data.data_loader import bulk_load
+
+                universe = [s for s in TOP_STOCKS if s != "Other"]
+                progress_bar = st.progress(0.0)
+                prices, errors = bulk_load(
+                    universe, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"),
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"Loaded {done}/{total} symbols")
+                )
+                progress_bar.empty()
+                if errors:
+                    st.warning("Skipped " + ", ".join(f"{symbol} ({reason})" for symbol, reason in errors.items()))
+                if prices.empty:
+                    st.error("No data found for the universe and date range.")
+                    st.stop()
+                st.session_state['portfolio_result'] = backtest_portfolio(
+                    prices, strategy, strategy_params, initial_capital=initial_capital, commission=commission
+                )
             except Exception as e:
-                st.error(f"Optimization failed: {str(e)}")
+                st.error(f"Portfolio backtest failed: {str(e)}")
+
+    if 'portfolio_result' in st.session_state:
+        portfolio_result = st.session_state['portfolio_result']
+        portfolio = portfolio_result.portfolio["Portfolio"]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Final Portfolio Value", f"${portfolio.iloc[-1]:,.2f}")
+        with col2:
+            st.metric("Symbols", portfolio_result.positions.shape[1])
+        st.line_chart(portfolio)
+        with st.expander("Per-Symbol Returns"):
+            symbol_returns = (1 + portfolio_result.strategy_returns).prod() - 1
+            st.dataframe((symbol_returns * 100).rename("Total Return (%)").sort_values(ascending=False))
+
+    # Footer
+    st.markdown("---")
+    if 'results' in st.session_state:
+        from strategies.indicators import INDICATOR_CACHE
+        from visuals.render import FIGURE_CACHE
+
+        cache_stats = INDICATOR_CACHE.stats()
+        figure_stats = FIGURE_CACHE.stats()
+        st.caption(
+            f"Indicator cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['bytes'] / 1e6:.1f} MB in {cache_stats['entries']} entries · "
+            f"Figure cache: {figure_stats['hits']} hits, {figure_stats['misses']} misses"
+        )
 
-# Footer
-st.markdown("---")
+if profiler is not None and profiler.events:
+    with st.expander("⏱ Performance"):
+        st.caption("Per-stage wall time, rows processed and peak memory for this rerun; times include nested stages.")
+        st.dataframe(profiler.to_frame(), hide_index=True)
+        st.download_button("Download JSON Trace", json.dumps(profiler.trace()), "trace.json", "application/json",
+                           help="Open in chrome://tracing or ui.perfetto.dev")
 st.markdown("Built with ❤️ using Streamlit")
\ No newline at end of file
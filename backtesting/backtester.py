@@ -1,16 +1,14 @@
+from profiling.profiler import profiled
+
+@profiled("backtest")
 def backtest(data, initial_capital=100000, commission=0.001):
     df = data.copy()
     df["Position"] = df["Signal"].shift()
     df["Returns"] = df["Close"].pct_change()
-    df["Strategy_Returns"] = df["Position"] * df["Returns"]
-
-    # Calculate transaction costs
-    # df["Position_Change"] = df["Position"].diff().fillna(0)
-    # df["Trade"] = df["Position_Change"].abs()  # 1 if position changed
-    # df["Costs"] = df["Trade"] * commission * df["Close"]  # Commission cost
 
-    # Adjust returns for costs (approximate)
-    # df["Strategy_Returns"] = df["Strategy_Returns"] - (df["Costs"] / initial_capital)
+    # Commission on every change in position, as a fraction of the traded notional
+    df["Costs"] = df["Position"].diff().abs().fillna(df["Position"].abs()) * commission
+    df["Strategy_Returns"] = df["Position"] * df["Returns"] - df["Costs"]
 
     df["Portfolio"] = (1 + df["Strategy_Returns"]).cumprod() * initial_capital
     return df
@@ -0,0 +1,186 @@
+import argparse
+import os
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.format import dtype_to_descr, read_array_header_1_0, read_array_header_2_0, read_magic, \
+    write_array_header_1_0
+
+from data.cache import DEFAULT_CACHE_DIR, INDEX_FILE, commit_version, new_version, read_meta, symbol_dir, version_dir
+from profiling.profiler import profiled
+from strategies.streaming import STREAMING_STRATEGIES
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+ChunkedResult = namedtuple("ChunkedResult", ["bars", "final_value", "path"])
+
+
+class _ColumnReader:
+    """
+    Reads row ranges of a 1-D .npy file through a memory map of just that
+    range, which is unmapped again once copied out, so pages of chunks
+    already processed do not stay resident.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            version = read_magic(f)
+            read_header = read_array_header_1_0 if version == (1, 0) else read_array_header_2_0
+            (self.length,), _, self.dtype = read_header(f)
+            self.offset = f.tell()
+
+    def __len__(self):
+        return self.length
+
+    def read(self, start, stop):
+        if stop <= start:
+            return np.empty(0, dtype=self.dtype)
+        window = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset + start * self.dtype.itemsize,
+                           shape=(stop - start,))
+        values = np.array(window)
+        del window
+        return values
+
+
+class _ColumnWriter:
+    """
+    Result columns appended chunk by chunk to .npy files laid out like the
+    market data cache, so read_columns() and read_frame() can load them
+    back. Chunks are written with plain file appends rather than a memory
+    map, so nothing already written stays resident. Files go to a new
+    version directory that is committed only once every chunk is written.
+    """
+
+    def __init__(self, symbol, output_dir, n_rows, dtypes):
+        self.symbol = symbol
+        self.output_dir = output_dir
+        self.directory = symbol_dir(symbol, output_dir)
+        self.scratch = new_version(symbol, output_dir)
+        self.dtypes = {"": np.dtype("datetime64[ns]"), **{name: np.dtype(dtype) for name, dtype in dtypes.items()}}
+        files = [INDEX_FILE] + [f"{i}.npy" for i in range(len(dtypes))]
+        self.files = {}
+        for name, filename in zip(self.dtypes, files):
+            f = open(os.path.join(self.scratch, filename), "wb")
+            header = {"descr": dtype_to_descr(self.dtypes[name]), "fortran_order": False, "shape": (n_rows,)}
+            write_array_header_1_0(f, header)
+            self.files[name] = f
+
+    def write(self, index, columns):
+        for name, values in {"": index, **columns}.items():
+            np.ascontiguousarray(values, dtype=self.dtypes[name]).tofile(self.files[name])
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def commit(self, meta):
+        self.close()
+        commit_version(self.symbol, self.scratch, {**meta, "columns": list(self.dtypes)[1:]}, self.output_dir)
+
+
+@profiled("backtest")
+def chunked_backtest(symbol, strategy_name, params=None, initial_capital=100000, chunk_size=DEFAULT_CHUNK_SIZE,
+                     cache_dir=DEFAULT_CACHE_DIR, output_dir=None, progress=None):
+    """
+    Out-of-core backtest of a cached symbol, reading `chunk_size` bars at a
+    time from the cache files, each through a memory map of only that chunk,
+    so memory use does not grow with the length of the history.
+    The streaming strategy carries its rolling windows across chunks, and
+    the previous close, previous signal and running equity are carried by
+    hand, so every column equals backtest(strategy(data), commission=0) on
+    the whole history loaded into memory.
+    With `output_dir`, the input columns, the strategy's indicators, Signal
+    (int8), Position, Returns, Strategy_Returns and Portfolio are written to
+    output_dir in the cache layout; load them with read_frame(symbol, ...,
+    cache_dir=output_dir). `progress` is called as progress(done, total)
+    after each chunk.
+    Returns a ChunkedResult(bars, final_value, path), final_value being the
+    last portfolio value.
+    """
+    meta = read_meta(symbol, cache_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No cached bars for {symbol} in {cache_dir}")
+    directory = version_dir(symbol, meta, cache_dir)
+    index = _ColumnReader(os.path.join(directory, INDEX_FILE))
+    columns = {
+        name: _ColumnReader(os.path.join(directory, f"{i}.npy")) for i, name in enumerate(meta["columns"])
+    }
+
+    strategy = STREAMING_STRATEGIES[strategy_name](**(params or {}))
+    n_bars = len(index)
+    writer = None
+    previous_close = np.nan
+    previous_signal = np.nan
+    growth = 1.0
+
+    for start in range(0, n_bars, chunk_size):
+        stop = min(start + chunk_size, n_bars)
+        close = columns["Close"].read(start, stop).astype(np.float64, copy=False)
+        signals = strategy.update_block(close)
+        signal = signals["Signal"]
+
+        # Signal.shift() and Close.pct_change(), continued from the previous chunk
+        position = np.empty(len(close))
+        position[0] = previous_signal
+        position[1:] = signal[:-1]
+        previous = np.empty(len(close))
+        previous[0] = previous_close
+        previous[1:] = close[:-1]
+        returns = close / previous - 1
+        strategy_returns = position * returns
+
+        # (1 + Strategy_Returns).cumprod() skipping NaNs, as pandas does
+        factors = 1 + strategy_returns
+        missing = np.isnan(factors)
+        factors[missing] = 1.0
+        cumulative = np.cumprod(np.concatenate(([growth], factors)))[1:]
+        growth = cumulative[-1]
+        cumulative[missing] = np.nan
+        portfolio = cumulative * initial_capital
+
+        previous_close, previous_signal = close[-1], signal[-1]
+
+        if output_dir is not None:
+            results = {name: reader.read(start, stop) for name, reader in columns.items()}
+            results.update(signals)
+            results.update({
+                "Position": position,
+                "Returns": returns,
+                "Strategy_Returns": strategy_returns,
+                "Portfolio": portfolio,
+            })
+            if writer is None:
+                dtypes = {name: values.dtype for name, values in results.items()}
+                writer = _ColumnWriter(symbol, output_dir, n_bars, dtypes)
+            writer.write(index.read(start, stop), results)
+
+        if progress is not None:
+            progress(stop, n_bars)
+
+    path = None
+    if writer is not None:
+        writer.commit({key: value for key, value in meta.items() if key not in ("columns", "version")})
+        path = writer.directory
+    return ChunkedResult(n_bars, float(growth * initial_capital), path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest a cached symbol chunk by chunk, out of core")
+    parser.add_argument("symbol", help="Symbol whose bars are in the market data cache")
+    parser.add_argument("--strategy", default="Moving Average Crossover", choices=list(STREAMING_STRATEGIES))
+    parser.add_argument("--capital", type=float, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bars held in memory at once")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--output-dir", help="Write the result columns here in the cache layout")
+    args = parser.parse_args(argv)
+
+    result = chunked_backtest(args.symbol, args.strategy, initial_capital=args.capital, chunk_size=args.chunk_size,
+                              cache_dir=args.cache_dir, output_dir=args.output_dir)
+    print(f"Backtested {result.bars:,} bars, final portfolio value {result.final_value:,.2f}")
+    if result.path:
+        print(f"Results written to {result.path}")
+
+
+if __name__ == "__main__":
+    main()
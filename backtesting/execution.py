@@ -0,0 +1,128 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from profiling.profiler import profiled
+
+TRADING_DAYS = 252
+
+# Exit codes of the rule that closed a position
+EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_TRAILING_STOP = 1, 2, 3
+EXIT_REASONS = {EXIT_STOP_LOSS: "Stop Loss", EXIT_TAKE_PROFIT: "Take Profit", EXIT_TRAILING_STOP: "Trailing Stop"}
+
+ExecutionResult = namedtuple("ExecutionResult", ["position", "returns", "costs", "strategy_returns", "portfolio",
+                                                 "exits"])
+
+
+def _rule(value, k, default=np.nan):
+    """One value per parameter set; None (or NaN) switches the rule off"""
+    if value is None:
+        return np.full(k, default)
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (k,)).copy()
+
+
+def _run_extremes(close, changed):
+    """
+    Highest and lowest close of every signal run up to and including each
+    bar. Running max/min restart at each run by offsetting the integer rank
+    of each close by the run number, so the result is exact (equal closes
+    may rank in any order, as they map back to the same price).
+    """
+    n = len(close)
+    order = np.argsort(close)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    offset = np.cumsum(changed, axis=1, dtype=np.int64) * n
+    peak = close[order[np.maximum.accumulate(rank + offset, axis=1) - offset]]
+    trough = close[order[n - 1 - (np.maximum.accumulate((n - 1 - rank) + offset, axis=1) - offset)]]
+    return peak, trough
+
+
+@profiled("backtest")
+def execute(close, signals, initial_capital=100000, commission=0.0, slippage=0.0, stop_loss=None, take_profit=None,
+            trailing_stop=None, target_vol=None, vol_window=20, max_leverage=1.0):
+    """
+    Path-dependent execution of one or many signal columns on a close series.
+    `signals` is a (bars,) array or a (bars, sets) block, one column per
+    parameter set; every rule argument is a scalar or one value per column,
+    None switching it off. As in backtest(), the signal at a close is the
+    position held over the next bar.
+    - commission and slippage: fractions of the traded notional, charged on
+      every change in position (a flip from long to short trades twice).
+    - stop_loss / take_profit: exit at the first close at least that
+      fraction against / in favour of the close the position was entered on.
+    - trailing_stop: exit at the first close that fraction below the highest
+      close since entry (above the lowest, for shorts).
+    - target_vol: size each position at entry to target_vol / the annualized
+      volatility of the last `vol_window` returns, capped at max_leverage;
+      entries without a volatility estimate yet stay flat.
+    After a rule exit the position stays flat until the signal changes.
+    Runs of the signal are found from its change points and the rules are
+    evaluated for all bars and columns at once, so there is no per-bar loop;
+    the block is scanned one parameter set per contiguous row, which keeps
+    the running sums and maxima fast however many sets there are.
+    Returns an ExecutionResult of (bars,) or (bars, sets) arrays: position,
+    returns, costs, strategy_returns (net of costs), portfolio and exits
+    (the EXIT_* code on the bar a rule closed a position, else 0).
+    """
+    close = np.asarray(close, dtype=np.float64).reshape(-1)
+    signals = np.asarray(signals)
+    single = signals.ndim == 1
+    # One row of bars per parameter set
+    signals = np.ascontiguousarray(signals.reshape(len(close), -1).T)
+    k, n = signals.shape
+
+    # Every bar knows the bar its run of the same signal started on
+    changed = np.ones((k, n), dtype=bool)
+    changed[:, 1:] = signals[:, 1:] != signals[:, :-1]
+    start = np.maximum.accumulate(np.where(changed, np.arange(n), 0), axis=1)
+
+    held = signals
+    exits = np.zeros((k, n), dtype=np.int8)
+    stop_loss, take_profit, trailing_stop = (_rule(value, k)[:, None] for value in (stop_loss, take_profit, trailing_stop))
+    if n and not np.isnan(np.concatenate([stop_loss, take_profit, trailing_stop])).all():
+        long, short = signals > 0, signals < 0
+        ratio = close / close[start]
+        # Assigned in reverse priority, so a stop loss wins a tie on the same bar
+        if not np.isnan(trailing_stop).all():
+            peak, trough = _run_extremes(close, changed)
+            exits[(long & (close <= peak * (1 - trailing_stop)))
+                  | (short & (close >= trough * (1 + trailing_stop)))] = EXIT_TRAILING_STOP
+        exits[(long & (ratio >= 1 + take_profit)) | (short & (ratio <= 1 - take_profit))] = EXIT_TAKE_PROFIT
+        exits[(long & (ratio <= 1 - stop_loss)) | (short & (ratio >= 1 + stop_loss))] = EXIT_STOP_LOSS
+
+        # Only the first exit of a run counts; the rest of the run is flat
+        hit = exits > 0
+        count = np.cumsum(hit, axis=1, dtype=np.int64)
+        count -= np.take_along_axis(count, start, axis=1) - np.take_along_axis(hit, start, axis=1)
+        exits[~hit | (count != 1)] = 0
+        held = np.where(count > 0, 0, signals)
+
+    target_vol = _rule(target_vol, k)[:, None]
+    if n and not np.isnan(target_vol).all():
+        returns = pd.Series(close).pct_change()
+        volatility = returns.rolling(vol_window).std().to_numpy() * np.sqrt(TRADING_DAYS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            leverage = np.minimum(target_vol / volatility, _rule(max_leverage, k, 1.0)[:, None])
+        size = np.where(np.isnan(target_vol), 1.0, np.nan_to_num(leverage, nan=0.0))
+        # Sized once, at the close the position is entered on
+        held = held * np.take_along_axis(size, start, axis=1)
+
+    position = np.zeros((k, n), dtype=held.dtype)
+    position[:, 1:] = held[:, :-1]
+    returns = np.full(n, np.nan)
+    if n:
+        np.divide(close[1:], close[:-1], out=returns[1:])
+        returns[1:] -= 1
+    rate = _rule(commission, k, 0.0) + _rule(slippage, k, 0.0)
+    costs = np.abs(np.diff(position, axis=1, prepend=0)) * rate[:, None]
+    strategy_returns = position * returns - costs
+    portfolio = np.empty((k, n))
+    if n:
+        portfolio[:, 0] = initial_capital
+        portfolio[:, 1:] = np.cumprod(1 + strategy_returns[:, 1:], axis=1) * initial_capital
+
+    arrays = (position, costs, strategy_returns, portfolio, exits)
+    position, costs, strategy_returns, portfolio, exits = (values[0] if single else values.T for values in arrays)
+    return ExecutionResult(position, returns, costs, strategy_returns, portfolio, exits)
@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from profiling.profiler import profiled
+
+PortfolioResult = namedtuple(
+    "PortfolioResult", ["signals", "positions", "strategy_returns", "costs", "weights", "portfolio"]
+)
+
+
+def ma_signal_matrix(prices, short_window=20, long_window=50):
+    """MA crossover signals for every column of a (dates x symbols) price matrix"""
+    short_ma = prices.rolling(window=short_window).mean()
+    long_ma = prices.rolling(window=long_window).mean()
+    return (short_ma > long_ma).astype(np.int8) - (short_ma < long_ma).astype(np.int8)
+
+
+def rsi_signal_matrix(prices, rsi_period=14, overbought=70, oversold=30):
+    """RSI signals for every column of a (dates x symbols) price matrix"""
+    delta = prices.diff()
+    # Zero out the first bar of each symbol like the single-symbol RSI, but
+    # keep the dates before it started trading missing
+    listed = prices.notna()
+    gain = delta.where(delta > 0, 0).where(listed)
+    loss = (-delta).where(delta < 0, 0).where(listed)
+
+    rs = gain.rolling(rsi_period).mean() / loss.rolling(rsi_period).mean()
+    rsi = 100 - (100 / (1 + rs))
+
+    signals = (rsi < oversold).astype(np.int8)
+    return signals.mask(rsi > overbought, -1)
+
+
+def momentum_signal_matrix(prices, lookback_period=20, threshold=0.0):
+    """Momentum signals for every column of a (dates x symbols) price matrix"""
+    past = prices.shift(lookback_period)
+    momentum = (prices - past) / past
+
+    signals = (momentum > threshold).astype(np.int8)
+    return signals.mask(momentum < -threshold, -1)
+
+
+SIGNAL_MATRICES = {
+    "Moving Average Crossover": ma_signal_matrix,
+    "RSI Strategy": rsi_signal_matrix,
+    "Momentum Strategy": momentum_signal_matrix,
+}
+
+
+def portfolio_weights(prices, weights=None):
+    """
+    Daily target weights for every symbol.
+    Weights default to equal and are renormalized each day over the symbols
+    that have a price, so a symbol that lists later is phased in on its
+    first bar rather than diluting the portfolio before it exists.
+    """
+    available = prices.notna()
+    if weights is None:
+        raw = available.astype(float)
+    else:
+        raw = available * pd.Series(weights, dtype=float).reindex(prices.columns).fillna(0.0)
+    total = raw.sum(axis=1)
+    return raw.div(total.where(total > 0), axis=0).fillna(0.0)
+
+
+@profiled("backtest")
+def backtest_portfolio(prices, strategy_name, params=None, weights=None, initial_capital=100000,
+                       commission=0.001):
+    """
+    Backtest one strategy across every symbol of an aligned (dates x symbols)
+    price matrix in a single vectorized pass.
+    Leading NaNs mark symbols that had not started trading; interior gaps
+    are forward-filled, so a position is simply held through a missing bar.
+    Per symbol, positions and returns follow backtest(): yesterday's signal
+    is today's position. Commission is charged on every change in position,
+    as a fraction of the traded weight. The portfolio rebalances daily to
+    `weights` (equal by default) over the symbols trading that day.
+    """
+    prices = prices.ffill()
+    signals = SIGNAL_MATRICES[strategy_name](prices, **(params or {}))
+    signals = signals.where(prices.notna(), 0).astype(np.int8)
+
+    positions = signals.shift(1).fillna(0)
+    returns = prices.pct_change(fill_method=None).fillna(0)
+    costs = positions.diff().abs().fillna(positions.abs()) * commission
+    strategy_returns = positions * returns - costs
+
+    # Weights are set at the previous close, before today's bar is known
+    target = portfolio_weights(prices, weights).shift(1).fillna(0.0)
+    portfolio_returns = (target * strategy_returns).sum(axis=1)
+    portfolio = pd.DataFrame({
+        "Strategy_Returns": portfolio_returns,
+        "Portfolio": (1 + portfolio_returns).cumprod() * initial_capital,
+    })
+    return PortfolioResult(signals, positions, strategy_returns, costs, target, portfolio)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from backtesting.execution import execute
+from profiling.profiler import profiled
+from strategies.momentum import momentum_signals
+from strategies.moving_average import moving_average_signals
+from strategies.rsi import rsi_signals
+
+SIGNAL_FUNCTIONS = {
+    "Moving Average Crossover": moving_average_signals,
+    "RSI Strategy": rsi_signals,
+    "Momentum Strategy": momentum_signals,
+}
+
+# Columns only shown or plotted are stored as float32; anything that is
+# compounded keeps float64
+DISPLAY_DTYPE = np.float32
+
+
+class RunResult:
+    """
+    Compact, array-backed result of one strategy run.
+    Holds only the columns the run needs as typed NumPy arrays (float32 for
+    prices and indicators, int8 for signals and positions, float64 for
+    returns and equity) and shares the date index of the input data instead
+    of copying it. Columns are exposed as pandas Series views on demand and
+    to_frame() builds a DataFrame only when one is needed for display.
+    """
+
+    def __init__(self, index, columns):
+        self.index = index
+        self.columns = dict(columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self.columns[key], index=self.index, name=key, copy=False)
+        # Boolean row mask, e.g. result[result["Signal"] == 1]
+        mask = np.asarray(key, dtype=bool)
+        return RunResult(self.index[mask], {name: values[mask] for name, values in self.columns.items()})
+
+    @property
+    def empty(self):
+        return len(self.index) == 0
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns (the shared index is not counted)"""
+        return sum(values.nbytes for values in self.columns.values())
+
+    def to_frame(self, columns=None):
+        names = list(self.columns) if columns is None else list(columns)
+        return pd.DataFrame({name: self.columns[name] for name in names}, index=self.index)
+
+    def tail(self, n=5, columns=None):
+        return self[np.arange(len(self)) >= len(self) - n].to_frame(columns)
+
+
+@profiled("backtest")
+def run_backtest(data, strategy_name, params=None, initial_capital=100000, execution=None):
+    """
+    Signals and backtest of one strategy in a single pass, without widening
+    copies of the input frame. Returns a RunResult with Close, the strategy's
+    indicator columns, Signal, Position, Returns, Strategy_Returns and
+    Portfolio; trading rules match the strategy functions and backtest().
+    `execution` holds keyword arguments of execute() (commission, slippage,
+    stops, volatility sizing); with any, positions and returns come from
+    execute() and the result also has Costs and Exit columns.
+    """
+    close = np.asarray(data["Close"], dtype=np.float64).reshape(-1)
+    signals = SIGNAL_FUNCTIONS[strategy_name](close, **(params or {}))
+
+    columns = {"Close": close.astype(DISPLAY_DTYPE)}
+    for name, values in signals.items():
+        columns[name] = values if name == "Signal" else values.astype(DISPLAY_DTYPE)
+
+    if execution:
+        result = execute(close, signals["Signal"], initial_capital, **execution)
+        columns.update({
+            "Position": result.position,
+            "Returns": result.returns,
+            "Costs": result.costs,
+            "Strategy_Returns": result.strategy_returns,
+            "Portfolio": result.portfolio,
+            "Exit": result.exits,
+        })
+        return RunResult(data.index, columns)
+
+    position = np.zeros(len(close), dtype=np.int8)
+    position[1:] = signals["Signal"][:-1]
+    returns = np.full(len(close), np.nan)
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1
+    strategy_returns = position * returns
+    portfolio = np.empty(len(close))
+    if len(close):
+        portfolio[0] = initial_capital
+        portfolio[1:] = np.cumprod(1 + strategy_returns[1:]) * initial_capital
+
+    columns.update({
+        "Position": position,
+        "Returns": returns,
+        "Strategy_Returns": strategy_returns,
+        "Portfolio": portfolio,
+    })
+    return RunResult(data.index, columns)
@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+
+from batch.store import ResultStore
+from data import cache
+from data.data_loader import bulk_load, csv_fetcher, load_data, yahoo_fetcher
+from optimization.parallel import default_workers
+from strategies.indicators import fingerprint
+
+DEFAULT_STORE = "batch_results"
+METRIC_COLUMNS = ("total_return", "annual_return", "volatility", "sharpe", "sortino", "max_drawdown", "calmar")
+TRADE_COLUMNS = ("trades", "win_rate", "profit_factor")
+
+
+def expand_jobs(spec):
+    """
+    Expand a job spec into (symbol, strategy_name, params) jobs.
+    `spec["strategies"]` maps each strategy name to its parameters, a value
+    or a list of values per parameter; every combination of the lists is
+    run for every symbol. Parameters left out keep the strategy defaults.
+    """
+    jobs = []
+    for strategy_name, grid in spec["strategies"].items():
+        names = list(grid or {})
+        values = [value if isinstance(value, list) else [value] for value in (grid or {}).values()]
+        for combination in itertools.product(*values):
+            params = dict(zip(names, combination))
+            jobs.extend((symbol, strategy_name, params) for symbol in spec["symbols"])
+    return jobs
+
+
+def job_id(spec, symbol, strategy_name, params, data_key):
+    """Hash of everything a job's result depends on, including the bars it runs on"""
+    inputs = {
+        "symbol": symbol,
+        "strategy": strategy_name,
+        "params": params,
+        "start": spec["start"],
+        "end": spec["end"],
+        "initial_capital": spec.get("initial_capital", 100000),
+        "data": data_key,
+    }
+    return hashlib.blake2b(json.dumps(inputs, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def _run_symbol(symbol, start, end, initial_capital, jobs, cache_dir):
+    """Worker task: every job of one symbol, loading its bars from the cache once"""
+    from backtesting.result import run_backtest
+    from metrics.performance import performance_metrics
+    from metrics.trades import trade_stats
+
+    data = load_data(symbol, start, end, offline=True, cache_dir=cache_dir)
+    rows = []
+    for key, strategy_name, params in jobs:
+        row = {"job_id": key, "symbol": symbol, "strategy": strategy_name,
+               "params": json.dumps(params, sort_keys=True), "bars": len(data)}
+        try:
+            results = run_backtest(data, strategy_name, params, initial_capital)
+            metrics = performance_metrics(results["Strategy_Returns"])
+            trades = trade_stats(results["Position"], results["Returns"])
+            row.update({name: float(metrics[name]) for name in METRIC_COLUMNS})
+            row.update({name: float(trades[name]) for name in TRADE_COLUMNS})
+            row["final_value"] = float(results["Portfolio"].iloc[-1])
+            row["error"] = ""
+        except Exception as error:
+            row.update({name: np.nan for name in METRIC_COLUMNS + TRADE_COLUMNS + ("final_value",)})
+            row["error"] = f"{type(error).__name__}: {error}"
+        rows.append(row)
+    return rows
+
+
+def run_batch(spec, store_dir=DEFAULT_STORE, workers=None, checkpoint_every=100, task_size=64, force=False,
+              cache_dir=cache.DEFAULT_CACHE_DIR, log=print):
+    """
+    Run every job of `spec` and append the results to the ResultStore in
+    `store_dir`.
+    Bars are fetched for all symbols up front (concurrently, see
+    bulk_load()); jobs are then grouped by symbol into tasks of up to
+    `task_size` jobs and run on a pool of `workers` processes, each task
+    reading its symbol from the data cache once.
+    Finished rows are appended every `checkpoint_every` jobs and on
+    interruption, so a rerun resumes where the last one stopped: a job whose
+    id (a hash of its spec entry and of its bars, see job_id()) is already
+    stored without an error is skipped unless `force` is set.
+    Returns a summary dict with the job, skipped, run and failed counts.
+    """
+    fetcher = csv_fetcher(spec["csv_dir"]) if spec.get("csv_dir") else yahoo_fetcher
+    start, end = spec["start"], spec["end"]
+    initial_capital = spec.get("initial_capital", 100000)
+    jobs = expand_jobs(spec)
+
+    prices, errors = bulk_load(spec["symbols"], start, end, fetcher=fetcher, cache_dir=cache_dir)
+    for symbol, reason in errors.items():
+        log(f"Skipping {symbol}: {reason}")
+    data_keys = {symbol: fingerprint(prices[symbol].dropna().to_numpy()) for symbol in prices.columns}
+
+    store = ResultStore(store_dir)
+    done = set() if force else store.completed()
+    pending = {}
+    skipped = 0
+    for symbol, strategy_name, params in jobs:
+        if symbol not in data_keys:
+            continue
+        key = job_id(spec, symbol, strategy_name, params, data_keys[symbol])
+        if key in done:
+            skipped += 1
+            continue
+        pending.setdefault(symbol, []).append((key, strategy_name, params))
+
+    total = sum(len(symbol_jobs) for symbol_jobs in pending.values())
+    log(f"{len(jobs)} jobs: {skipped} unchanged, {total} to run, "
+        f"{len(jobs) - skipped - total} without data")
+
+    buffer = []
+    finished = failed = 0
+    started = time.perf_counter()
+
+    def collect(rows):
+        nonlocal finished, failed
+        buffer.extend(rows)
+        finished += len(rows)
+        failed += sum(1 for row in rows if row["error"])
+
+    def checkpoint():
+        run_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        store.append([{**row, "start": start, "end": end, "run_at": run_at} for row in buffer])
+        buffer.clear()
+
+    workers = default_workers() if workers is None else max(1, int(workers))
+    futures = []
+    collected = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                for symbol, symbol_jobs in pending.items():
+                    for i in range(0, len(symbol_jobs), task_size):
+                        futures.append(pool.submit(_run_symbol, symbol, start, end, initial_capital,
+                                                   symbol_jobs[i:i + task_size], cache_dir))
+                for future in as_completed(futures):
+                    collected.add(future)
+                    collect(future.result())
+                    if len(buffer) >= checkpoint_every:
+                        checkpoint()
+                        log(f"{finished}/{total} jobs done ({time.perf_counter() - started:.1f}s)")
+            except BaseException:
+                # Leaving the with-block would run every queued task first; cancel them
+                # instead, and keep the rows of the tasks that finished in the meantime
+                pool.shutdown(cancel_futures=True)
+                for future in futures:
+                    if (future not in collected and future.done() and not future.cancelled()
+                            and future.exception() is None):
+                        collect(future.result())
+                raise
+    finally:
+        # Keep whatever finished, even when interrupted
+        if buffer:
+            checkpoint()
+
+    log(f"Finished {finished} jobs ({failed} failed) in {time.perf_counter() - started:.1f}s")
+    return {"jobs": len(jobs), "skipped": skipped, "run": finished, "failed": failed,
+            "no_data": len(jobs) - skipped - total}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a strategy x symbol x parameter sweep from a job spec")
+    parser.add_argument("spec", help="JSON job spec (symbols, start, end, strategies; optional initial_capital, csv_dir)")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Result store directory")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Jobs between result appends")
+    parser.add_argument("--force", action="store_true", help="Rerun jobs even if their inputs are unchanged")
+    parser.add_argument("--cache-dir", default=cache.DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    summary = run_batch(spec, args.store, args.workers, args.checkpoint_every, force=args.force,
+                        cache_dir=args.cache_dir)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+
+
+class ResultStore:
+    """
+    Append-only columnar store of batch results.
+    Every append() writes a new immutable part directory holding one .npy
+    file per column (strings as fixed-width unicode, so no pickling), next
+    to a meta.json listing the columns. Parts are written to a scratch
+    directory and renamed into place, so an interrupted run never leaves a
+    half-written part behind and earlier parts are never rewritten.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def parts(self):
+        return sorted(name for name in os.listdir(self.directory) if re.fullmatch(r"part-\d{6}", name))
+
+    def append(self, rows):
+        """Write a list of row dicts (all with the same keys) as a new part; returns its path"""
+        if not rows:
+            return None
+        names = list(rows[0])
+        parts = self.parts()
+        number = int(parts[-1].split("-")[1]) + 1 if parts else 0
+        path = os.path.join(self.directory, f"part-{number:06d}")
+        scratch = path + ".tmp"
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(scratch)
+        for i, name in enumerate(names):
+            np.save(os.path.join(scratch, f"{i}.npy"), np.array([row[name] for row in rows]), allow_pickle=False)
+        with open(os.path.join(scratch, META_FILE), "w") as f:
+            json.dump({"columns": names, "rows": len(rows)}, f)
+        os.replace(scratch, path)
+        return path
+
+    def read_part(self, part, columns=None):
+        path = os.path.join(self.directory, part)
+        with open(os.path.join(path, META_FILE)) as f:
+            names = json.load(f)["columns"]
+        wanted = names if columns is None else [name for name in columns if name in names]
+        return pd.DataFrame({
+            name: np.load(os.path.join(path, f"{names.index(name)}.npy"), mmap_mode="r") for name in wanted
+        })
+
+    def read(self, columns=None):
+        """Every stored row as one DataFrame, oldest part first"""
+        frames = [self.read_part(part, columns) for part in self.parts()]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    def completed(self):
+        """Job ids of the rows stored without an error"""
+        done = set()
+        for part in self.parts():
+            frame = self.read_part(part, ["job_id", "error"])
+            done.update(frame.loc[frame["error"] == "", "job_id"])
+        return done
@@ -0,0 +1,47 @@
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold=0.2, min_seconds=0.001):
+    """
+    Compare two benchmark reports stage by stage.
+    A stage regresses when it is more than `threshold` (fractional) slower
+    than the baseline; stages faster than `min_seconds` in both runs are too
+    noisy to judge and never flagged.
+    Returns a list of (stage, baseline_s, current_s, ratio, regressed).
+    """
+    rows = []
+    for stage in sorted(set(baseline["results"]) & set(current["results"])):
+        before, after = baseline["results"][stage], current["results"][stage]
+        ratio = after / before if before > 0 else float("inf")
+        regressed = ratio > 1 + threshold and max(before, after) >= min_seconds
+        rows.append((stage, before, after, ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag benchmark regressions against a stored baseline")
+    parser.add_argument("baseline", help="Baseline report written by benchmarks.run")
+    parser.add_argument("current", help="Report to check")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--min-seconds", type=float, default=0.001, help="Ignore stages faster than this")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold, args.min_seconds)
+    for stage, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{stage:<32} {before * 1000:>10.2f} ms -> {after * 1000:>10.2f} ms  {ratio:>6.2f}x  {flag}")
+
+    regressions = [row for row in rows if row[4]]
+    print(f"{len(regressions)} regression(s) in {len(rows)} stages")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
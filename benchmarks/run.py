@@ -0,0 +1,187 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backtesting.backtester import backtest
+from backtesting.execution import execute
+from backtesting.result import run_backtest
+from benchmarks.synthetic import synthetic_ohlcv
+from metrics.performance import performance_metrics
+from metrics.trades import trade_stats
+from optimization.grid import grid_search
+from strategies.indicators import INDICATOR_CACHE
+from strategies.momentum import momentum_strategy
+from strategies.moving_average import moving_average_strategy
+from strategies.rsi import rsi_strategy
+from visuals.plot_equity import plot_equity_curve
+from visuals.plot_ma_strategy import plot_ma_strategy
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+FULL_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a fresh interpreter and prints its own elapsed seconds
+STARTUP_SNIPPETS = {
+    # Modules the dashboard imports once a backtest is run
+    "startup.import": (
+        "import data.data_loader, backtesting.result, metrics.performance, metrics.trades, "
+        "visuals.plot_equity, visuals.plot_ma_strategy"
+    ),
+    "startup.first_render": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "app = AppTest.from_file({app!r}, default_timeout=60)\n"
+        "app.run()\n"
+        "assert not app.exception, app.exception\n"
+    ),
+}
+
+STRATEGIES = {
+    "ma": ("Moving Average Crossover", moving_average_strategy),
+    "rsi": ("RSI Strategy", rsi_strategy),
+    "momentum": ("Momentum Strategy", momentum_strategy),
+}
+
+
+def best_time(func, repeat):
+    """
+    Fastest of `repeat` timed calls of func(). The indicator cache is
+    cleared before every call so each one measures a cold computation.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        INDICATOR_CACHE.clear()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _plot(func, *args):
+    # Render to PNG in memory, as the dashboard does; no figure cache
+    func(*args, cache=None).savefig(io.BytesIO(), format="png")
+
+
+def _startup_time(snippet):
+    code = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        f"{snippet}\n"
+        "print(time.perf_counter() - started)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def benchmark_startup(repeat=3):
+    """
+    Cold-start cost of the dashboard, each run in a new interpreter so no
+    module is already imported: the imports needed before the first paint,
+    and one full first render of app.py through Streamlit's AppTest.
+    Returns {stage: seconds}.
+    """
+    app = os.path.join(ROOT, "app.py")
+    return {
+        stage: min(_startup_time(snippet.format(app=app)) for _ in range(repeat))
+        for stage, snippet in STARTUP_SNIPPETS.items()
+    }
+
+
+def benchmark_size(data, repeat=3, optimize=True, plot=True):
+    """Time every pipeline stage on one synthetic frame; returns {stage: seconds}"""
+    timings = {}
+    for key, (_, strategy) in STRATEGIES.items():
+        timings[f"signals.{key}"] = best_time(lambda: strategy(data), repeat)
+
+    strategy_data = moving_average_strategy(data)
+    timings["backtest"] = best_time(lambda: backtest(strategy_data), repeat)
+    timings["backtest.lean"] = best_time(lambda: run_backtest(data, "Moving Average Crossover"), repeat)
+    rules = {"commission": 0.001, "stop_loss": 0.05, "take_profit": 0.10, "trailing_stop": 0.05, "target_vol": 0.15}
+    timings["backtest.rules"] = best_time(
+        lambda: run_backtest(data, "Moving Average Crossover", execution=rules), repeat
+    )
+    # 16 stop levels on one signal in a single batch call
+    signal_block = np.repeat(strategy_data["Signal"].to_numpy(np.int8)[:, None], 16, axis=1)
+    timings["backtest.rules_batch"] = best_time(
+        lambda: execute(data["Close"], signal_block, commission=0.001, stop_loss=np.linspace(0.01, 0.16, 16)), repeat
+    )
+
+    results = backtest(strategy_data)
+    timings["metrics"] = best_time(
+        lambda: (performance_metrics(results["Strategy_Returns"]), trade_stats(results["Position"], results["Returns"])),
+        repeat,
+    )
+
+    if optimize:
+        for key, (name, _) in STRATEGIES.items():
+            timings[f"optimize.{key}"] = best_time(lambda: grid_search(name, data), repeat)
+
+    if plot:
+        timings["plot.signals"] = best_time(lambda: _plot(plot_ma_strategy, strategy_data), repeat)
+        timings["plot.equity"] = best_time(lambda: _plot(plot_equity_curve, results), repeat)
+    return timings
+
+
+def run(sizes, frequency="daily", seed=0, repeat=3, max_optimize_bars=1_000_000, max_plot_bars=1_000_000,
+        startup=True, log=print):
+    """Benchmark every stage at every size; returns the JSON-ready report"""
+    results = {}
+    if startup:
+        for stage, seconds in benchmark_startup(repeat).items():
+            results[f"{stage}@app"] = seconds
+            log(f"{stage:<20} {'app':>17}  {seconds * 1000:>12.2f} ms")
+    for size in sizes:
+        data = synthetic_ohlcv(size, frequency=frequency, seed=seed)
+        timings = benchmark_size(data, repeat, optimize=size <= max_optimize_bars, plot=size <= max_plot_bars)
+        for stage, seconds in timings.items():
+            results[f"{stage}@{size}"] = seconds
+            log(f"{stage:<20} {size:>12,} bars  {seconds * 1000:>12.2f} ms")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "frequency": frequency,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the backtesting pipeline on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Bar counts to benchmark")
+    parser.add_argument("--full", action="store_true", help="Benchmark up to 10M bars")
+    parser.add_argument("--frequency", choices=["daily", "minute"], default="daily")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the fastest is kept")
+    parser.add_argument("--max-optimize-bars", type=int, default=1_000_000,
+                        help="Skip the grid optimization stage above this many bars")
+    parser.add_argument("--max-plot-bars", type=int, default=1_000_000,
+                        help="Skip the plotting stage above this many bars")
+    parser.add_argument("--skip-startup", action="store_true",
+                        help="Skip the dashboard import and first-render timings")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    report = run(sizes, args.frequency, args.seed, args.repeat, args.max_optimize_bars, args.max_plot_bars,
+                 not args.skip_startup)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
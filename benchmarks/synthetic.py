@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# (annual drift, annual volatility) of the bull, sideways and bear regimes
+REGIMES = np.array([
+    [0.15, 0.15],
+    [0.00, 0.20],
+    [-0.25, 0.40],
+])
+
+FREQUENCIES = {
+    "daily": ("B", 252),
+    "minute": ("min", 252 * 390),
+}
+
+
+def _calendar(start, n_bars, freq):
+    """
+    Bar timestamps as datetime64[s], which reaches far past the year 2262
+    limit of nanoseconds, so a million business days fit on any pandas
+    version. Business days come from np.busday_offset() rather than
+    pd.date_range(), which steps through them one at a time.
+    """
+    start = np.datetime64(pd.Timestamp(start), "s")
+    if freq != "B":
+        return pd.date_range(start, periods=n_bars, freq=freq, unit="s").values
+    day = start.astype("datetime64[D]")
+    days = np.busday_offset(day, np.arange(n_bars), roll="forward")
+    return days.astype("datetime64[s]") + (start - day.astype("datetime64[s]"))
+
+
+def synthetic_ohlcv(n_bars, frequency="daily", seed=0, start="2000-01-03", mean_regime_bars=None,
+                    initial_price=100.0):
+    """
+    Seeded synthetic OHLCV bars: geometric Brownian motion whose drift and
+    volatility switch between the REGIMES at random, with bars on a
+    business-day ("daily") or minute ("minute") calendar. The same seed
+    always yields the same frame, so benchmark runs are comparable. The
+    index has second resolution, so daily frames of any size stay valid.
+    Regimes last `mean_regime_bars` bars on average (about half a year of
+    bars by default).
+    """
+    freq, bars_per_year = FREQUENCIES[frequency]
+    rng = np.random.default_rng(seed)
+    mean_regime_bars = mean_regime_bars or bars_per_year // 2
+
+    # Regime boundaries from geometric run lengths, expanded without a per-bar loop
+    lengths = rng.geometric(1 / mean_regime_bars, size=n_bars // mean_regime_bars + 2)
+    while lengths.sum() < n_bars:
+        lengths = np.append(lengths, rng.geometric(1 / mean_regime_bars, size=len(lengths)))
+    states = rng.integers(0, len(REGIMES), size=len(lengths))
+    regime = np.repeat(states, lengths)[:n_bars]
+
+    dt = 1 / bars_per_year
+    drift, vol = REGIMES[regime, 0], REGIMES[regime, 1]
+    log_returns = (drift - 0.5 * vol ** 2) * dt + vol * np.sqrt(dt) * rng.standard_normal(n_bars)
+    close = initial_price * np.exp(np.cumsum(log_returns))
+
+    open_ = np.empty(n_bars)
+    open_[0] = initial_price
+    open_[1:] = close[:-1]
+    open_ *= np.exp(vol * np.sqrt(dt) * 0.1 * rng.standard_normal(n_bars))
+    wick = vol * np.sqrt(dt) * np.abs(rng.standard_normal((2, n_bars)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = np.round(rng.lognormal(13, 0.5, n_bars))
+
+    index = pd.DatetimeIndex(_calendar(start, n_bars, freq), name="Date")
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index
+    )
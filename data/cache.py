@@ -0,0 +1,182 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MARKET_DATA_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+
+INDEX_FILE = "index.npy"
+META_FILE = "meta.json"
+
+# Age after which a version directory that is not the current one is
+# taken to be left over from a crashed or superseded write and removed
+STALE_VERSION_SECONDS = 24 * 60 * 60
+
+# Times read_columns() re-reads the metadata when a concurrent write removed the arrays it pointed to
+READ_ATTEMPTS = 3
+
+
+def symbol_dir(symbol, cache_dir=DEFAULT_CACHE_DIR):
+    """Directory holding the cached columns of one symbol"""
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper()))
+
+
+def read_meta(symbol, cache_dir=DEFAULT_CACHE_DIR):
+    """Cached coverage and layout of a symbol, or None if it has never been cached"""
+    path = os.path.join(symbol_dir(symbol, cache_dir), META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def version_dir(symbol, meta, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Directory holding the arrays `meta` describes. Every write puts its
+    arrays in a new version directory inside symbol_dir() and then points
+    the metadata at it.
+    """
+    return os.path.join(symbol_dir(symbol, cache_dir), meta["version"])
+
+
+def new_version(symbol, cache_dir=DEFAULT_CACHE_DIR):
+    """Create an empty version directory, unique to the caller, for a write to fill before commit_version()"""
+    directory = symbol_dir(symbol, cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkdtemp(prefix="v", dir=directory)
+
+
+def commit_version(symbol, version, meta, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Make the arrays written to `version` (a new_version() directory) the
+    cached bars of a symbol, described by `meta`. The metadata file is
+    replaced in one atomic rename, so readers see either the old arrays or
+    the new ones, never a mix or a gap; the version it replaced is removed,
+    as are stale versions (see STALE_VERSION_SECONDS) that crashed writes
+    or a concurrent commit left behind. Of two concurrent writes the last
+    commit wins.
+    """
+    directory = symbol_dir(symbol, cache_dir)
+    previous = read_meta(symbol, cache_dir)
+    fd, scratch = tempfile.mkstemp(suffix=".json", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        json.dump({**meta, "version": os.path.basename(version)}, f)
+    os.replace(scratch, os.path.join(directory, META_FILE))
+
+    if previous is not None:
+        shutil.rmtree(version_dir(symbol, previous, cache_dir), ignore_errors=True)
+
+    current = (read_meta(symbol, cache_dir) or {}).get("version")
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("v") and name != current and os.path.isdir(path):
+            try:
+                stale = now - os.path.getmtime(path) > STALE_VERSION_SECONDS
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def read_columns(symbol, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Memory-map the cached arrays of a symbol.
+    Returns (index, {column: array}, meta) where index holds datetime64[ns]
+    wall-clock timestamps; nothing is read from disk until the arrays are
+    sliced. Columns are mapped copy-on-write: pages stay shared with the
+    file until written, and writes go to private copies, never to the
+    cache. Open maps stay valid when a later write replaces the cache.
+    """
+    for attempt in range(READ_ATTEMPTS):
+        meta = read_meta(symbol, cache_dir)
+        if meta is None:
+            return None, {}, None
+        directory = version_dir(symbol, meta, cache_dir)
+        try:
+            index = np.load(os.path.join(directory, INDEX_FILE), mmap_mode="r")
+            columns = {
+                name: np.load(os.path.join(directory, f"{i}.npy"), mmap_mode="c")
+                for i, name in enumerate(meta["columns"])
+            }
+        except FileNotFoundError:
+            # A concurrent write replaced this version between reading meta and the arrays
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+            continue
+        return index, columns, meta
+
+
+def read_frame(symbol, start, end, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Cached bars of a symbol in [start, end) as a DataFrame (empty if nothing
+    is cached). The columns are views of the copy-on-write maps of
+    read_columns() rather than copies, so only the pages written to are
+    ever copied.
+    """
+    index, columns, meta = read_columns(symbol, cache_dir)
+    if meta is None:
+        return pd.DataFrame()
+
+    lo, hi = np.searchsorted(index, [np.datetime64(pd.Timestamp(start)), np.datetime64(pd.Timestamp(end))])
+    dates = pd.DatetimeIndex(np.asarray(index[lo:hi]), name=meta.get("index_name"))
+    if meta.get("tz"):
+        dates = dates.tz_localize(meta["tz"])
+    return pd.DataFrame({name: np.asarray(values[lo:hi]) for name, values in columns.items()}, index=dates,
+                        copy=False)
+
+
+def write_frame(symbol, frame, start, end, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Replace the cached bars of a symbol with `frame`, recording [start, end)
+    as the covered date range. Files are written to a new version directory
+    and swapped in by commit_version(), so neither a crash nor a concurrent
+    writer leaves a half-written cache.
+    """
+    scratch = new_version(symbol, cache_dir)
+
+    index = pd.DatetimeIndex(frame.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_localize(None)
+    # as_unit() raises on dates past 2262 instead of wrapping around like astype()
+    np.save(os.path.join(scratch, INDEX_FILE), index.as_unit("ns").values)
+
+    names = [str(name) for name in frame.columns]
+    for i, name in enumerate(frame.columns):
+        np.save(os.path.join(scratch, f"{i}.npy"), frame[name].to_numpy(dtype=np.float64))
+
+    meta = {
+        "symbol": symbol,
+        "start": pd.Timestamp(start).strftime("%Y-%m-%d"),
+        "end": pd.Timestamp(end).strftime("%Y-%m-%d"),
+        "columns": names,
+        "tz": tz,
+        "index_name": index.name,
+    }
+    commit_version(symbol, scratch, meta, cache_dir)
+
+
+def missing_ranges(meta, start, end):
+    """
+    Date ranges of [start, end) not yet covered by the cache.
+    The cache always covers one contiguous range, so a request beyond either
+    edge is filled all the way from that edge, never leaving holes.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if meta is None:
+        return [(start, end)]
+    cached_start, cached_end = pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"])
+    ranges = []
+    if start < cached_start:
+        ranges.append((start, cached_start))
+    if end > cached_end:
+        ranges.append((cached_end, end))
+    return ranges
@@ -1,11 +1,227 @@
-import yfinance as yf
+import logging
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.error import HTTPError
+from urllib.parse import quote
+
 import pandas as pd
 
-def load_data(symbol, start, end):
-    data = yf.download(symbol, start=start, end=end)
+from data import cache
+from profiling.profiler import profiled
+
+OFFLINE = os.environ.get("MARKET_DATA_OFFLINE", "").lower() in ("1", "true", "yes")
+
+DEFAULT_MAX_WORKERS = 8
+
+BulkLoad = namedtuple("BulkLoad", ["prices", "errors"])
+
+# yfinance reports these for symbols or date ranges without bars; any other
+# error behind an empty download is a failure (network, rate limit) worth retrying
+NO_DATA_ERRORS = ("delisted", "no price data", "no data found", "no timezone found")
+
+
+class DownloadError(IOError):
+    """A download that failed, as opposed to one that found no bars"""
+
+
+class _ErrorLog(logging.Handler):
+    """Collects the failed-download errors yfinance logs for one symbol"""
+
+    def __init__(self, symbol):
+        super().__init__(logging.ERROR)
+        self.tag = f"'{symbol.upper()}'"
+        self.messages = []
+
+    def emit(self, record):
+        message = record.getMessage()
+        # yfinance logs failures as "['SYMBOL', ...]: error"
+        if self.tag in message.split("]:")[0]:
+            self.messages.append(message.split("]:", 1)[-1].strip())
+
+
+def yahoo_fetcher(symbol, start, end):
+    """
+    Default fetcher: daily bars for [start, end) from Yahoo Finance.
+    yf.download() returns an empty frame instead of raising when a download
+    fails, so an empty result with a reported error other than "no bars"
+    (see NO_DATA_ERRORS) raises DownloadError, which retrying() retries.
+    """
+    import yfinance as yf
+    from yfinance import shared
+
+    errors = _ErrorLog(symbol)
+    logger = logging.getLogger("yfinance")
+    logger.addHandler(errors)
+    try:
+        # One symbol per call; bulk_load() runs calls concurrently itself
+        data = yf.download(symbol, start=start, end=end, progress=False, threads=False)
+    finally:
+        logger.removeHandler(errors)
+
+    if data.empty:
+        # Older yfinance versions keep the errors in shared._ERRORS instead of only logging them
+        reported = errors.messages + [str(error) for error in [getattr(shared, "_ERRORS", {}).get(symbol.upper())] if error]
+        failures = [error for error in reported if not any(text in error.lower() for text in NO_DATA_ERRORS)]
+        if failures:
+            raise DownloadError(f"{symbol}: {failures[0]}")
+        return data
+    if isinstance(data.columns, pd.MultiIndex):
+        # Recent yfinance versions add a ticker level even for a single symbol
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+
+def csv_fetcher(directory):
+    """
+    Fetcher reading `<directory>/<symbol>.csv` instead of the network.
+    Useful as a local stand-in for Yahoo in tests and offline runs.
+    """
+    def fetch(symbol, start, end):
+        path = os.path.join(directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+        return data.loc[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+    return fetch
+
+
+def url_fetcher(url_template):
+    """
+    Fetcher reading CSV bars over HTTP from
+    `url_template.format(symbol=..., start=..., end=...)`, e.g. a local
+    stand-in server. A 404 means the symbol has no data; other HTTP errors
+    are raised so they can be retried.
+    """
+    def fetch(symbol, start, end):
+        url = url_template.format(symbol=quote(symbol), start=start, end=end)
+        try:
+            data = pd.read_csv(url, index_col=0, parse_dates=True)
+        except HTTPError as error:
+            if error.code == 404:
+                return pd.DataFrame()
+            raise
+        return data.loc[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+    return fetch
+
+
+def retrying(fetcher, retries=3, backoff=0.5):
+    """
+    Wrap a fetcher so a call that raises (e.g. DownloadError) is retried up to `retries` times,
+    waiting backoff * 2**attempt seconds (with jitter, so concurrent
+    retries do not hit the backend in lockstep) before each new attempt.
+    """
+    def fetch(symbol, start, end):
+        for attempt in range(retries + 1):
+            try:
+                return fetcher(symbol, start, end)
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    return fetch
+
+
+@profiled("load")
+def load_data(symbol, start, end, fetcher=yahoo_fetcher, use_cache=True, offline=None,
+              cache_dir=cache.DEFAULT_CACHE_DIR):
+    """
+    Load OHLCV bars for `symbol` in [start, end).
+    Bars are kept in an on-disk columnar cache; only the dates missing from
+    the cached range are fetched, the rest is memory-mapped from disk.
+    `fetcher(symbol, start, end)` returns a date-indexed DataFrame and can be
+    swapped for a local stand-in. In offline mode nothing is fetched and
+    whatever the cache holds for the range is returned.
+    """
+    if not use_cache:
+        data = fetcher(symbol, start, end)
+        data.dropna(inplace=True)
+        return data
+
+    offline = OFFLINE if offline is None else offline
+    meta = cache.read_meta(symbol, cache_dir)
+    # Never mark dates after today as covered: their bars do not exist yet
+    today = pd.Timestamp.today().normalize()
+    gaps = [
+        (gap_start, min(gap_end, today))
+        for gap_start, gap_end in cache.missing_ranges(meta, start, end)
+        if gap_start < today
+    ]
+
+    if gaps and not offline:
+        parts = [cache.read_frame(symbol, meta["start"], meta["end"], cache_dir)] if meta else []
+        for gap_start, gap_end in gaps:
+            fetched = fetcher(symbol, gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d"))
+            parts.append(fetched.dropna())
+        parts = [part for part in parts if not part.empty]
+
+        if parts:
+            columns = [c for c in parts[0].columns if all(c in part.columns for part in parts)]
+            merged = pd.concat([part[columns] for part in parts]).sort_index()
+            merged = merged[~merged.index.duplicated(keep="last")]
+            covered_start = min([pd.Timestamp(start)] + ([pd.Timestamp(meta["start"])] if meta else []))
+            covered_end = max([gap_end for _, gap_end in gaps] + ([pd.Timestamp(meta["end"])] if meta else []))
+            cache.write_frame(symbol, merged, covered_start, covered_end, cache_dir)
+
+    data = cache.read_frame(symbol, start, end, cache_dir)
     data.dropna(inplace=True)
     return data
 
+
+@profiled("load")
+def bulk_load(symbols, start, end, column="Close", fetcher=yahoo_fetcher, max_workers=DEFAULT_MAX_WORKERS,
+              retries=3, backoff=0.5, progress=None, **kwargs):
+    """
+    Load one price column for many symbols concurrently, at most
+    `max_workers` downloads at a time, each retried with backoff (see
+    retrying()). Symbols that fail or have no data do not stop the others.
+    Returns a BulkLoad(prices, errors): prices is a (dates x symbols)
+    DataFrame of the symbols that loaded, in the order given, NaN where a
+    symbol did not trade; errors maps each missing symbol to the reason.
+    `progress` is called as progress(done, total) as symbols finish.
+    Remaining keyword arguments go to load_data().
+    """
+    symbols = list(dict.fromkeys(symbols))
+    fetch = retrying(fetcher, retries, backoff)
+    series = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols) or 1))) as pool:
+        futures = {pool.submit(load_data, symbol, start, end, fetcher=fetch, **kwargs): symbol for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            try:
+                data = future.result()
+            except Exception as error:
+                errors[symbol] = f"{type(error).__name__}: {error}"
+            else:
+                if data.empty:
+                    errors[symbol] = "no data"
+                elif column not in data.columns:
+                    errors[symbol] = f"no {column} column"
+                else:
+                    series[symbol] = data[column]
+            if progress is not None:
+                progress(done, len(symbols))
+
+    prices = pd.DataFrame({symbol: series[symbol] for symbol in symbols if symbol in series}).sort_index()
+    return BulkLoad(prices, errors)
+
+
+def load_price_matrix(symbols, start, end, column="Close", **kwargs):
+    """
+    Load one price column for many symbols, aligned into a (dates x symbols)
+    DataFrame. Dates a symbol did not trade on are NaN; symbols with no data
+    are dropped. See bulk_load() for the per-symbol error report.
+    """
+    return bulk_load(symbols, start, end, column, **kwargs).prices
+
+
 if __name__ == "__main__":
     df = load_data("AAPL", "2020-01-01", "2024-01-01")
     print(df.head())
@@ -1,3 +1,5 @@
+import sys
+
 from data.data_loader import load_data
 from strategies.moving_average import moving_average_strategy
 from strategies.rsi import rsi_strategy
@@ -5,24 +7,38 @@ from backtesting.backtester import backtest
 from visuals.plot_ma_strategy import plot_ma_strategy
 from visuals.plot_rsi_strategy import plot_rsi_strategy
 from visuals.plot_equity import plot_equity_curve
+from metrics.performance import performance_metrics
+from profiling.profiler import profiling
 
-# Load data
-data = load_data("AAPL", "2020-01-01", "2024-01-01")
+# Every pipeline stage below is timed; pass a path to also save a JSON trace
+with profiling() as profiler:
+    # Load data
+    data = load_data("AAPL", "2020-01-01", "2024-01-01")
 
-# Apply MA strategy
-print("Running Moving Average Strategy...")
-ma_strategy_data = moving_average_strategy(data)
-ma_results = backtest(ma_strategy_data, commission=0.0)
-plot_ma_strategy(ma_strategy_data)
-plot_equity_curve(ma_results, "ma_equity_curve.png")
-print("MA Strategy plots saved.")
+    # Apply MA strategy
+    print("Running Moving Average Strategy...")
+    ma_strategy_data = moving_average_strategy(data)
+    ma_results = backtest(ma_strategy_data, commission=0.0)
+    ma_metrics = performance_metrics(ma_results["Strategy_Returns"].to_numpy())
+    print(f"Total return {ma_metrics['total_return']:.2%}, Sharpe {ma_metrics['sharpe']:.2f}")
+    plot_ma_strategy(ma_strategy_data, "ma_strategy.png")
+    plot_equity_curve(ma_results, "ma_equity_curve.png")
+    print("MA Strategy plots saved.")
 
-# Apply RSI strategy
-print("Running RSI Strategy...")
-rsi_strategy_data = rsi_strategy(data)
-rsi_results = backtest(rsi_strategy_data, commission=0.0)
-plot_rsi_strategy(rsi_strategy_data)
-plot_equity_curve(rsi_results, "rsi_equity_curve.png")
-print("RSI Strategy plots saved.")
+    # Apply RSI strategy
+    print("Running RSI Strategy...")
+    rsi_strategy_data = rsi_strategy(data)
+    rsi_results = backtest(rsi_strategy_data, commission=0.0)
+    rsi_metrics = performance_metrics(rsi_results["Strategy_Returns"].to_numpy())
+    print(f"Total return {rsi_metrics['total_return']:.2%}, Sharpe {rsi_metrics['sharpe']:.2f}")
+    plot_rsi_strategy(rsi_strategy_data, "rsi_strategy.png")
+    plot_equity_curve(rsi_results, "rsi_equity_curve.png")
+    print("RSI Strategy plots saved.")
 
 print("All plots saved successfully in images/ folder")
+
+print("\nPerformance by stage:")
+print(profiler.report())
+if len(sys.argv) > 1:
+    profiler.write_trace(sys.argv[1])
+    print(f"Trace written to {sys.argv[1]}")
@@ -1,4 +1,5 @@
 import numpy as np
+from profiling.profiler import profiled
 
 def sharpe_ratio(returns, risk_free_rate=0.0):
     return np.mean(returns - risk_free_rate) / np.std(returns)
@@ -7,3 +8,62 @@ def max_drawdown(portfolio):
     cumulative_max = portfolio.cummax()
     drawdown = (portfolio - cumulative_max) / cumulative_max
     return drawdown.min()
+
+@profiled("metrics")
+def performance_metrics(returns, risk_free_rate=0.0, periods_per_year=252):
+    """
+    Compute every headline metric of one or many return streams in one pass.
+    `returns` is a 1D series or a 2D (bars, strategies) block; NaN bars are
+    ignored per column, like dropna(). Shared intermediates (valid mask,
+    mean, deviations, compounded equity and its running peak) are computed
+    once for all metrics and all columns.
+    Returns a dict of floats for 1D input, or of arrays (one value per
+    column) for 2D input. Returns and drawdowns are fractions; Sharpe and
+    Sortino are annualized; Calmar is total return per unit of max drawdown.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    single = returns.ndim == 1
+    if single:
+        returns = returns[:, None]
+
+    valid = ~np.isnan(returns)
+    clean = np.where(valid, returns, 0.0)
+    count = valid.sum(axis=0)
+    safe_count = np.maximum(count, 1)
+
+    mean = clean.sum(axis=0) / safe_count
+    deviation = np.where(valid, returns - mean, 0.0)
+    std = np.sqrt((deviation ** 2).sum(axis=0) / np.maximum(count - 1, 1))
+
+    downside = clean < 0
+    downside_count = downside.sum(axis=0)
+    downside_mean = np.where(downside, clean, 0.0).sum(axis=0) / np.maximum(downside_count, 1)
+    downside_deviation = np.where(downside, clean - downside_mean, 0.0)
+    downside_std = np.sqrt((downside_deviation ** 2).sum(axis=0) / np.maximum(downside_count - 1, 1))
+
+    equity = np.cumprod(1 + clean, axis=0)
+    # The starting capital (equity 1.0) is the first peak
+    peak = np.maximum(np.maximum.accumulate(equity, axis=0), 1.0)
+    max_drawdown = (equity / peak - 1).min(axis=0) if len(equity) else np.zeros(returns.shape[1])
+    total_return = equity[-1] - 1 if len(equity) else np.zeros(returns.shape[1])
+
+    annualize = np.sqrt(periods_per_year)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where((count >= 2) & (std > 0),
+                          (mean - risk_free_rate / periods_per_year) / std * annualize, 0.0)
+        sortino = np.where((downside_count >= 2) & (downside_std > 0), mean / downside_std * annualize, 0.0)
+        calmar = np.where(max_drawdown < 0, total_return / np.abs(max_drawdown), 0.0)
+        annual_return = np.where(count > 0, (1 + total_return) ** (periods_per_year / safe_count) - 1, 0.0)
+
+    metrics = {
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "volatility": std * annualize,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "max_drawdown": max_drawdown,
+        "calmar": calmar,
+    }
+    if single:
+        return {name: float(values[0]) for name, values in metrics.items()}
+    return metrics
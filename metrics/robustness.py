@@ -0,0 +1,118 @@
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from metrics.performance import performance_metrics
+from profiling.profiler import profiled
+
+TRADING_DAYS = 252
+
+ROBUSTNESS_METRICS = ("sharpe", "max_drawdown", "total_return")
+RESAMPLING_METHODS = ("Block Bootstrap", "Trade Reordering")
+
+# Resampled values held in memory at once; sets how many resamples go in a chunk
+DEFAULT_CHUNK_VALUES = 1 << 20
+
+RobustnessResult = namedtuple("RobustnessResult", ["summary", "samples", "prob_loss"])
+
+
+def block_indices(rng, n, n_samples, block_size):
+    """
+    (n_samples, n) bar indices of circular block bootstrap resamples: each
+    row strings together blocks of `block_size` consecutive bars starting at
+    random bars, so short-range autocorrelation (volatility clusters,
+    trends) survives resampling. Blocks run past the last bar; read them
+    with np.take(..., mode="wrap") to continue from the first one.
+    """
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, (n_samples, n_blocks))
+    return (starts[:, :, None] + np.arange(block_size)).reshape(n_samples, -1)[:, :n]
+
+
+def reorder_indices(rng, starts, lengths, n_samples):
+    """
+    (n_samples, n) bar indices that replay the runs starting at `starts`
+    with `lengths` (trades and flat spells) in a random order each, keeping
+    the bars of every run together and in order.
+    """
+    order = rng.permuted(np.tile(np.arange(len(starts)), (n_samples, 1)), axis=1)
+    run_lengths = lengths[order]
+    offsets = starts[order] - (np.cumsum(run_lengths, axis=1) - run_lengths)
+    n = int(lengths.sum())
+    return np.repeat(offsets.ravel(), run_lengths.ravel()).reshape(n_samples, n) + np.arange(n)
+
+
+def _runs(positions):
+    changed = np.ones(len(positions), dtype=bool)
+    changed[1:] = positions[1:] != positions[:-1]
+    starts = np.flatnonzero(changed)
+    return starts, np.diff(np.append(starts, len(positions)))
+
+
+@profiled("metrics")
+def robustness_analysis(returns, positions=None, method="Block Bootstrap", n_samples=10000, block_size=None,
+                        confidence=0.95, seed=0, risk_free_rate=0.0, chunk_size=None, progress=None):
+    """
+    Distribution of a strategy's Sharpe ratio, max drawdown and total return
+    over `n_samples` resampled histories of its per-bar returns
+    (Strategy_Returns of backtest(); NaN bars are dropped).
+    - "Block Bootstrap": circular block bootstrap with blocks of
+      `block_size` bars (the cube root of the history by default).
+    - "Trade Reordering": the same trades (runs of a constant position, as
+      given by `positions`, and the flat spells between them) in random
+      orders. Total return and Sharpe do not change, so this mostly shows
+      how much of the drawdown was down to the order trades came in.
+    Resamples are scored in chunks of `chunk_size` (by default sized to keep
+    about DEFAULT_CHUNK_VALUES resampled returns in memory), each as one
+    (bars, resamples) index array and one batched performance_metrics()
+    call. The same seed and chunk size always give the same result.
+    `progress` is called as progress(done, total) after each chunk.
+    Returns a RobustnessResult: `summary`, a DataFrame with the observed
+    value, mean and the `confidence` interval (Lower, Median, Upper) of each
+    of ROBUSTNESS_METRICS; `samples`, the resampled values per metric; and
+    `prob_loss`, the share of resamples with a negative total return.
+    """
+    returns = np.asarray(returns, dtype=np.float64).reshape(-1)
+    valid = ~np.isnan(returns)
+    returns = returns[valid]
+    n = len(returns)
+    if n < 2:
+        raise ValueError("Need at least two bars of returns to resample")
+
+    rng = np.random.default_rng(seed)
+    if method == "Block Bootstrap":
+        block_size = max(1, int(round(n ** (1 / 3)))) if block_size is None else max(1, min(int(block_size), n))
+        draw = partial(block_indices, rng, n, block_size=block_size)
+    elif method == "Trade Reordering":
+        if positions is None:
+            raise ValueError("Trade Reordering needs the positions the returns were earned with")
+        starts, lengths = _runs(np.asarray(positions, dtype=np.float64).reshape(-1)[valid])
+        draw = partial(reorder_indices, rng, starts, lengths)
+    else:
+        raise ValueError(f"Unknown resampling method: {method}")
+
+    chunk_size = max(1, DEFAULT_CHUNK_VALUES // n) if chunk_size is None else max(1, int(chunk_size))
+    samples = {name: np.empty(n_samples) for name in ROBUSTNESS_METRICS}
+    for start in range(0, n_samples, chunk_size):
+        count = min(chunk_size, n_samples - start)
+        metrics = performance_metrics(np.take(returns, draw(count).T, mode="wrap"), risk_free_rate, TRADING_DAYS)
+        for name in ROBUSTNESS_METRICS:
+            samples[name][start:start + count] = metrics[name]
+        if progress is not None:
+            progress(start + count, n_samples)
+
+    observed = performance_metrics(returns, risk_free_rate)
+    tail = (1 - confidence) / 2 * 100
+    summary = pd.DataFrame(
+        {
+            "Observed": [observed[name] for name in ROBUSTNESS_METRICS],
+            "Mean": [samples[name].mean() for name in ROBUSTNESS_METRICS],
+            "Lower": [np.percentile(samples[name], tail) for name in ROBUSTNESS_METRICS],
+            "Median": [np.median(samples[name]) for name in ROBUSTNESS_METRICS],
+            "Upper": [np.percentile(samples[name], 100 - tail) for name in ROBUSTNESS_METRICS],
+        },
+        index=list(ROBUSTNESS_METRICS),
+    )
+    return RobustnessResult(summary, samples, float((samples["total_return"] < 0).mean()))
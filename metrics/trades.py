@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from profiling.profiler import profiled
+
+
+def _as_columns(positions, returns):
+    positions = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64)).reshape(-1)
+    if positions.ndim == 1:
+        positions = positions[:, None]
+    return positions, returns
+
+
+def trade_segments(positions, returns):
+    """
+    Split every column of a (bars, strategies) position block into trades.
+    A trade is a run of bars holding the same non-zero position; it is
+    entered at the close before its first bar and exited at the close of its
+    last bar. Runs are found from the change points of the flattened block,
+    so there is no per-bar or per-trade Python loop.
+    Returns a dict of per-trade arrays: column, start, bars, side, trade
+    return (compounded over the run) and whether the trade is still open at
+    the last bar.
+    """
+    positions, returns = _as_columns(positions, returns)
+    n, k = positions.shape
+    if n == 0 or k == 0:
+        empty = np.array([], dtype=np.int64)
+        return {"column": empty, "start": empty, "bars": empty, "side": np.array([]),
+                "return": np.array([]), "open": np.array([], dtype=bool)}
+
+    # Column-major flattening keeps each strategy's bars contiguous
+    flat = positions.T.ravel()
+    growth = np.log1p(positions * returns[:, None]).T.ravel()
+
+    changed = np.empty(n * k, dtype=bool)
+    changed[0] = True
+    changed[1:] = flat[1:] != flat[:-1]
+    changed[::n] = True  # a run never continues into the next column
+    bounds = np.flatnonzero(changed)
+
+    bars = np.diff(np.append(bounds, n * k))
+    side = flat[bounds]
+    with np.errstate(invalid="ignore"):
+        trade_returns = np.expm1(np.add.reduceat(growth, bounds))
+
+    held = side != 0
+    bounds, bars, side, trade_returns = bounds[held], bars[held], side[held], trade_returns[held]
+    start = bounds % n
+    return {
+        "column": bounds // n,
+        "start": start,
+        "bars": bars,
+        "side": side,
+        "return": trade_returns,
+        "open": start + bars == n,
+    }
+
+
+@profiled("metrics")
+def trade_ledger(positions, returns, close=None, index=None):
+    """
+    Trade ledger of a single position series as a DataFrame with one row per
+    trade: entry/exit bar (or date), side, holding period in bars, entry/exit
+    price when `close` is given, return and whether the trade is still open.
+    """
+    segments = trade_segments(positions, returns)
+    entry = np.maximum(segments["start"] - 1, 0)
+    exit = segments["start"] + segments["bars"] - 1
+    ledger = pd.DataFrame({
+        "Entry": entry if index is None else np.asarray(index)[entry],
+        "Exit": exit if index is None else np.asarray(index)[exit],
+        "Side": segments["side"],
+        "Bars": segments["bars"],
+    })
+    if close is not None:
+        close = np.asarray(close, dtype=np.float64).reshape(-1)
+        ledger["Entry_Price"] = close[entry]
+        ledger["Exit_Price"] = close[exit]
+    ledger["Return"] = segments["return"]
+    ledger["Open"] = segments["open"]
+    return ledger
+
+
+@profiled("metrics")
+def batch_trade_stats(positions, returns, include_open=False):
+    """
+    Trade statistics for every column of a (bars, strategies) position block.
+    Returns a dict of arrays: trades, win_rate (%), profit_factor, avg_win,
+    avg_loss and exposure (% of bars with a position). Profit factor is inf
+    when there are winning but no losing trades and 0 without trades.
+    """
+    positions, returns = _as_columns(positions, returns)
+    k = positions.shape[1]
+    segments = trade_segments(positions, returns)
+    keep = np.ones(len(segments["return"]), dtype=bool) if include_open else ~segments["open"]
+    column = segments["column"][keep]
+    trade_returns = segments["return"][keep]
+
+    wins = trade_returns > 0
+    losses = trade_returns < 0
+    trades = np.bincount(column, minlength=k)
+    win_count = np.bincount(column, weights=wins, minlength=k)
+    loss_count = np.bincount(column, weights=losses, minlength=k)
+    gross_profit = np.bincount(column, weights=np.where(wins, trade_returns, 0.0), minlength=k)
+    gross_loss = -np.bincount(column, weights=np.where(losses, trade_returns, 0.0), minlength=k)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(trades > 0, win_count / trades * 100, 0.0)
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss,
+                                 np.where(gross_profit > 0, np.inf, 0.0))
+        avg_win = np.where(win_count > 0, gross_profit / win_count, 0.0)
+        avg_loss = np.where(loss_count > 0, -gross_loss / loss_count, 0.0)
+    exposure = (positions != 0).mean(axis=0) * 100 if len(positions) else np.zeros(k)
+
+    return {
+        "trades": trades,
+        "win_rate": win_rate,
+        "profit_factor": profit_factor,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "exposure": exposure,
+    }
+
+
+@profiled("metrics")
+def trade_stats(positions, returns, include_open=False):
+    """Trade statistics of a single position series as a dict of scalars"""
+    stats = batch_trade_stats(positions, returns, include_open)
+    return {name: values[0].item() for name, values in stats.items()}
@@ -0,0 +1,190 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from optimization.grid import SCORE_COLUMNS, STRATEGIES, _plain, close_prices, grid_search, search_result
+from profiling.profiler import profiled
+
+# Parameter ranges of the dashboard sliders; adaptive searches draw from
+# every combination instead of a coarse hand-picked grid
+SEARCH_SPACES = {
+    "Moving Average Crossover": (range(5, 51), range(20, 201)),
+    "RSI Strategy": (range(5, 51), range(60, 91), range(10, 41)),
+    "Momentum Strategy": (range(5, 101), np.round(np.arange(-0.10, 0.105, 0.01), 2)),
+}
+
+AdaptiveResult = namedtuple("AdaptiveResult", ["best_params", "best_sharpe", "surface", "evaluations", "cost"])
+
+
+def search_space(strategy_name):
+    """
+    Every valid parameter set of the strategy's search space, in grid order,
+    and their coordinates scaled to [0, 1] per parameter. MA sets whose
+    short window is not below the long window are left out.
+    """
+    axes = [np.asarray(values) for values in SEARCH_SPACES[strategy_name]]
+    positions = np.stack(np.meshgrid(*[np.arange(len(axis)) for axis in axes], indexing="ij"), -1)
+    positions = positions.reshape(-1, len(axes))
+    if strategy_name == "Moving Average Crossover":
+        positions = positions[axes[0][positions[:, 0]] < axes[1][positions[:, 1]]]
+    params = [tuple(_plain(axis[i]) for axis, i in zip(axes, row)) for row in positions]
+    coordinates = positions / np.maximum([len(axis) - 1 for axis in axes], 1)
+    return params, coordinates
+
+
+class _Evaluator:
+    """Scores parameter sets on the trailing bars of a close series, counting backtests and bars used"""
+
+    def __init__(self, strategy_name, close, risk_free_rate, commission=0.0):
+        self.strategy_name = strategy_name
+        self.close = close
+        self.risk_free_rate = risk_free_rate
+        self.commission = commission
+        self.evaluations = 0
+        self.bars = 0
+
+    def __call__(self, params, n_bars=None):
+        close = self.close if n_bars is None else self.close[-n_bars:]
+        _, _, surface = grid_search(self.strategy_name, {"Close": close}, self.risk_free_rate, params=params,
+                                 commission=self.commission)
+        self.evaluations += len(params)
+        self.bars += len(params) * len(close)
+        return surface[list(SCORE_COLUMNS)].to_numpy()
+
+    @property
+    def cost(self):
+        """Bars scored, in full-length backtests"""
+        return self.bars / max(len(self.close), 1)
+
+
+def _result(strategy_name, params, scores, evaluator):
+    names, _, _ = STRATEGIES[strategy_name]
+    best_params, best_sharpe, surface = search_result(names, params, scores)
+    return AdaptiveResult(best_params, best_sharpe, surface, evaluator.evaluations, evaluator.cost)
+
+
+@profiled("optimize")
+def random_search(strategy_name, data, budget=128, seed=0, risk_free_rate=0.02, progress=None, commission=0.0):
+    """
+    Score `budget` parameter sets drawn uniformly without replacement from
+    the strategy's search space on the full history.
+    """
+    space, _ = search_space(strategy_name)
+    rng = np.random.default_rng(seed)
+    params = [space[i] for i in rng.choice(len(space), min(budget, len(space)), replace=False)]
+    evaluator = _Evaluator(strategy_name, close_prices(data), risk_free_rate, commission)
+    scores = evaluator(params)
+    if progress is not None:
+        progress(evaluator.evaluations, evaluator.evaluations)
+    return _result(strategy_name, params, scores, evaluator)
+
+
+@profiled("optimize")
+def successive_halving(strategy_name, data, budget=128, seed=0, risk_free_rate=0.02, eta=3, min_bars=252,
+                       progress=None, commission=0.0):
+    """
+    Successive halving: score many random parameter sets on a short trailing
+    sub-period, keep the best 1/eta of them, and rescore the survivors on a
+    period eta times longer, until the last rung uses the full history.
+    The number of candidates is chosen so the total cost is about `budget`
+    full-length backtests; the shortest sub-period has at least `min_bars`
+    bars. The surface holds the full-length scores of the finalists. Early
+    rungs only see the most recent bars, so this works best when the recent
+    period is representative of the whole history.
+    """
+    space, _ = search_space(strategy_name)
+    close = close_prices(data)
+    evaluator = _Evaluator(strategy_name, close, risk_free_rate, commission)
+    rungs = max(int(math.log(max(len(close) / min_bars, 1), eta)), 0) + 1
+    # Every rung costs about n / eta**(rungs - 1) full-length backtests
+    n_candidates = min(int(budget * eta ** (rungs - 1) / rungs), len(space))
+    rng = np.random.default_rng(seed)
+    params = [space[i] for i in rng.choice(len(space), max(n_candidates, 1), replace=False)]
+
+    for rung in range(rungs):
+        n_bars = len(close) if rung == rungs - 1 else int(len(close) / eta ** (rungs - 1 - rung))
+        scores = evaluator(params, n_bars)
+        if progress is not None:
+            progress(rung + 1, rungs)
+        if rung < rungs - 1:
+            sharpe = np.where(np.isnan(scores[:, 0]), -np.inf, scores[:, 0])
+            # Stable sort keeps ties in draw order
+            keep = np.sort(np.argsort(-sharpe, kind="stable")[:max(len(params) // eta, 1)])
+            params = [params[i] for i in keep]
+    return _result(strategy_name, params, scores, evaluator)
+
+
+def _gp_posterior(x_train, y_train, x_test, length_scale=0.1, noise=1e-3):
+    """Mean and standard deviation of a Gaussian process with an RBF kernel"""
+    def kernel(a, b):
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(-1)
+        return np.exp(-0.5 * distances / length_scale ** 2)
+
+    factor = np.linalg.cholesky(kernel(x_train, x_train) + noise * np.eye(len(x_train)))
+    alpha = np.linalg.solve(factor.T, np.linalg.solve(factor, y_train))
+    cross = kernel(x_test, x_train)
+    mean = cross @ alpha
+    v = np.linalg.solve(factor, cross.T)
+    return mean, np.sqrt(np.clip(1 - (v ** 2).sum(0), 0, None))
+
+
+@profiled("optimize")
+def surrogate_search(strategy_name, data, budget=128, seed=0, risk_free_rate=0.02, initial=None, batch_size=8,
+                     pool_size=2048, kappa=2.0, progress=None, commission=0.0):
+    """
+    Surrogate-model (Bayesian) search: score `initial` random parameter sets
+    (a quarter of the budget by default), then repeatedly fit a Gaussian
+    process to the Sharpe ratios seen so far and score the `batch_size`
+    unseen sets, out of a random pool of `pool_size`, with the highest upper
+    confidence bound mean + kappa * std. Stops after `budget` full-length
+    backtests.
+    """
+    space, coordinates = search_space(strategy_name)
+    budget = min(budget, len(space))
+    rng = np.random.default_rng(seed)
+    evaluator = _Evaluator(strategy_name, close_prices(data), risk_free_rate, commission)
+
+    chosen = list(rng.choice(len(space), min(initial or max(budget // 4, 2), budget), replace=False))
+    scores = evaluator([space[i] for i in chosen])
+    while len(chosen) < budget:
+        if progress is not None:
+            progress(len(chosen), budget)
+        sharpe = scores[:, 0]
+        finite = np.isfinite(sharpe)
+        # Unscorable sets (no trades, flat curves) count as the worst seen
+        y = np.where(finite, sharpe, sharpe[finite].min() if finite.any() else 0.0)
+        y = (y - y.mean()) / (y.std() or 1.0)
+
+        unseen = np.setdiff1d(np.arange(len(space)), chosen)
+        pool = rng.choice(unseen, min(pool_size, len(unseen)), replace=False)
+        mean, std = _gp_posterior(coordinates[chosen], y, coordinates[pool])
+        picks = pool[np.argsort(-(mean + kappa * std), kind="stable")[:min(batch_size, budget - len(chosen))]]
+        scores = np.vstack([scores, evaluator([space[i] for i in picks])])
+        chosen.extend(picks)
+
+    if progress is not None:
+        progress(len(chosen), budget)
+    return _result(strategy_name, [space[i] for i in chosen], scores, evaluator)
+
+
+SEARCH_METHODS = {
+    "Random": random_search,
+    "Successive Halving": successive_halving,
+    "Surrogate Model": surrogate_search,
+}
+
+
+def adaptive_search(strategy_name, data, method="Successive Halving", budget=128, seed=0, risk_free_rate=0.02,
+                    progress=None, commission=0.0):
+    """
+    Search the strategy's full slider ranges with one of SEARCH_METHODS,
+    using about `budget` full-length backtests, net of `commission` as in
+    grid_search(). The same seed always gives
+    the same result. Returns an AdaptiveResult(best_params, best_sharpe,
+    surface, evaluations, cost): `evaluations` counts every backtest run,
+    including those on sub-periods, and `cost` the bars scored expressed in
+    full-length backtests.
+    """
+    return SEARCH_METHODS[method](strategy_name, data, budget=budget, seed=seed, risk_free_rate=risk_free_rate,
+                                  progress=progress, commission=commission)
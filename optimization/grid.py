@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+from strategies import indicators
+from strategies.indicators import fingerprint
+from metrics.performance import performance_metrics
+from metrics.trades import batch_trade_stats
+from profiling.profiler import profiled
+
+TRADING_DAYS = 252
+
+
+def ma_grid():
+    """Parameter sets for the MA crossover sweep, in grid-search order"""
+    return [(short, long) for short in range(5, 51, 5) for long in range(short + 5, 101, 10)]
+
+
+def rsi_grid():
+    """Parameter sets for the RSI sweep, in grid-search order"""
+    return [
+        (period, ob, os)
+        for period in range(5, 51, 5)
+        for ob in range(65, 91, 5)
+        for os in range(10, 36, 5)
+    ]
+
+
+def momentum_grid():
+    """Parameter sets for the momentum sweep, in grid-search order"""
+    return [(lookback, thresh) for lookback in range(5, 101, 10) for thresh in np.arange(-0.05, 0.06, 0.01)]
+
+
+def close_prices(data):
+    """Return the Close column of a price frame as a flat float64 array"""
+    return np.asarray(data["Close"], dtype=np.float64).reshape(-1)
+
+
+def rolling_means(values, windows):
+    """
+    Rolling means of `values` for every window in `windows`.
+    A single cumulative sum is shared by all windows, so each extra window
+    costs one subtraction instead of a fresh rolling pass.
+    Returns an (n, len(windows)) array with NaN before each window fills,
+    matching pandas' rolling(window).mean().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    # Centre the series before summing to limit cancellation error on long histories
+    center = values.mean() if n else 0.0
+    csum = np.zeros(n + 1)
+    np.cumsum(values - center, out=csum[1:])
+
+    out = np.full((n, len(windows)), np.nan)
+    for j, window in enumerate(windows):
+        if window <= n:
+            out[window - 1:, j] = (csum[window:] - csum[:-window]) / window + center
+    return out
+
+
+def _window_counts(mask, windows):
+    """Number of True entries in each trailing window (exact, integer arithmetic)"""
+    n = len(mask)
+    csum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(mask, out=csum[1:])
+    out = np.full((n, len(windows)), -1, dtype=np.int64)
+    for j, window in enumerate(windows):
+        if window <= n:
+            out[window - 1:, j] = csum[window:] - csum[:-window]
+    return out
+
+
+def rsi_values(close, periods):
+    """RSI for every period in `periods` as an (n, len(periods)) array"""
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    avg_gain = rolling_means(gain, periods)
+    avg_loss = rolling_means(loss, periods)
+    # Windows without a single gain/loss must be exactly zero (as in pandas),
+    # not the tiny residue left by differencing the cumulative sum
+    avg_gain[_window_counts(gain > 0, periods) == 0] = 0.0
+    avg_loss[_window_counts(loss > 0, periods) == 0] = 0.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def momentum_values(close, lookbacks):
+    """Rate of change for every lookback in `lookbacks` as an (n, len(lookbacks)) array"""
+    n = len(close)
+    out = np.full((n, len(lookbacks)), np.nan)
+    for j, lookback in enumerate(lookbacks):
+        if lookback < n:
+            past = close[:-lookback]
+            out[lookback:, j] = (close[lookback:] - past) / past
+    return out
+
+
+def indicator_matrix(name, kernel, close, windows, cache=indicators.INDICATOR_CACHE):
+    """
+    (n, len(windows)) block of an indicator, one column per entry of
+    `windows`. Each distinct window is looked up once in the shared
+    indicator cache under (data fingerprint, name, window); the missing
+    ones are computed together by one `kernel(close, missing)` call and
+    stored, so later chunks, sweeps and reruns reuse them. The columns for
+    `windows` are then gathered from the distinct block in one step.
+    """
+    data_key = fingerprint(close)
+    distinct = sorted(set(windows))
+    columns = {window: cache.lookup((data_key, name, window)) for window in distinct}
+    missing = [window for window, values in columns.items() if values is None]
+    if missing:
+        block = kernel(close, missing)
+        for j, window in enumerate(missing):
+            columns[window] = cache.store((data_key, name, window), np.ascontiguousarray(block[:, j]))
+    position = {window: j for j, window in enumerate(distinct)}
+    block = np.column_stack([columns[window] for window in distinct])
+    # take() keeps the block C-ordered like the score buffers, so column sums add up in the same order
+    return np.take(block, [position[window] for window in windows], axis=1)
+
+
+# The cumulative-sum kernels can differ from pandas' rolling passes in the
+# last bits, so their columns are cached apart from the strategies' own;
+# momentum is computed identically either way and shares its entries
+SWEEP_SMA = "sma.sweep"
+SWEEP_RSI = "rsi.sweep"
+
+
+def ma_signals(close, params):
+    """Signal matrix (int8, one column per (short, long) pair) for the MA crossover"""
+    short_ma = indicator_matrix(SWEEP_SMA, rolling_means, close, [short for short, _ in params])
+    long_ma = indicator_matrix(SWEEP_SMA, rolling_means, close, [long for _, long in params])
+    return (short_ma > long_ma).astype(np.int8) - (short_ma < long_ma).astype(np.int8)
+
+
+def rsi_signals(close, params):
+    """Signal matrix (int8, one column per (period, overbought, oversold) set) for the RSI strategy"""
+    rsi = indicator_matrix(SWEEP_RSI, rsi_values, close, [period for period, _, _ in params])
+
+    overbought = np.array([ob for _, ob, _ in params], dtype=np.float64)
+    oversold = np.array([os for _, _, os in params], dtype=np.float64)
+    signals = (rsi < oversold).astype(np.int8)
+    signals[rsi > overbought] = -1
+    return signals
+
+
+def momentum_signals(close, params):
+    """Signal matrix (int8, one column per (lookback, threshold) pair) for the momentum strategy"""
+    momentum = indicator_matrix("momentum", momentum_values, close, [lookback for lookback, _ in params])
+
+    thresholds = np.array([thresh for _, thresh in params], dtype=np.float64)
+    signals = (momentum > thresholds).astype(np.int8)
+    signals[momentum < -thresholds] = -1
+    return signals
+
+
+def strategy_returns(close, signals, out=None, commission=0.0):
+    """
+    Per-bar strategy returns for every signal column.
+    Mirrors backtest(): yesterday's signal is today's position, and the
+    first bar (no prior position or return) is dropped. `commission` is
+    charged on every change in position, as in execute().
+    Pass a preallocated (bars - 1, columns) float64 `out` to reuse it.
+    """
+    returns = close[1:] / close[:-1] - 1
+    out = np.multiply(signals[:-1], returns[:, None], out=out)
+    if commission:
+        out -= np.abs(np.diff(signals[:-1], axis=0, prepend=0)) * commission
+    return out
+
+
+STRATEGIES = {
+    "Moving Average Crossover": (("short_window", "long_window"), ma_grid, ma_signals),
+    "RSI Strategy": (("rsi_period", "overbought", "oversold"), rsi_grid, rsi_signals),
+    "Momentum Strategy": (("lookback_period", "threshold"), momentum_grid, momentum_signals),
+}
+
+
+SCORE_COLUMNS = ("Sharpe", "Sortino", "Max_Drawdown", "Total_Return", "Trades", "Win_Rate", "Profit_Factor")
+
+
+def score_params(strategy_name, close, params, risk_free_rate=0.02, buffer=None, commission=0.0):
+    """
+    Score every parameter set in `params` as one batch.
+    Returns a (len(params), len(SCORE_COLUMNS)) array: the annualized
+    Sharpe ratio and the other headline metrics of each equity curve, plus
+    the closed-trade count, win rate and profit factor from the trade ledger.
+    `buffer`, a (bars - 1, >= len(params)) float64 array, is reused for the
+    strategy returns block instead of allocating a new one per call.
+    Returns are net of `commission` per change in position.
+    """
+    _, _, signal_func = STRATEGIES[strategy_name]
+    signals = signal_func(close, params)
+    out = None if buffer is None else buffer[:, :len(params)]
+    metrics = performance_metrics(strategy_returns(close, signals, out, commission), risk_free_rate, TRADING_DAYS)
+    trades = batch_trade_stats(signals[:-1], close[1:] / close[:-1] - 1)
+    return np.column_stack([
+        metrics["sharpe"],
+        metrics["sortino"],
+        metrics["max_drawdown"],
+        metrics["total_return"],
+        trades["trades"],
+        trades["win_rate"],
+        trades["profit_factor"],
+    ])
+
+
+@profiled("optimize")
+def grid_search(strategy_name, data, risk_free_rate=0.02, params=None, chunk_size=64, progress=None, commission=0.0):
+    """
+    Vectorized grid search over the strategy's parameter grid.
+    The price series is extracted once and each chunk of `chunk_size`
+    parameter sets is scored as a 2D array, which keeps memory bounded on
+    long histories. Ties resolve to the first parameter set in grid order,
+    exactly like the nested-loop search.
+    `progress`, if given, is called as progress(done, total) after each chunk.
+    Scores are net of `commission` per change in position.
+    Returns (best_params, best_sharpe, surface) where surface is a DataFrame
+    with one row per parameter set and its SCORE_COLUMNS.
+    """
+    names, grid_func, _ = STRATEGIES[strategy_name]
+    params = grid_func() if params is None else list(params)
+    close = close_prices(data)
+
+    scores = np.empty((len(params), len(SCORE_COLUMNS)))
+    buffer = np.empty((max(len(close) - 1, 0), min(chunk_size, len(params))))
+    for start in range(0, len(params), chunk_size):
+        chunk = params[start:start + chunk_size]
+        scores[start:start + len(chunk)] = score_params(strategy_name, close, chunk, risk_free_rate, buffer, commission)
+        if progress is not None:
+            progress(start + len(chunk), len(params))
+
+    return search_result(names, params, scores)
+
+
+def search_result(names, params, scores):
+    """Build the (best_params, best_sharpe, surface) triple returned by every search"""
+    surface = pd.DataFrame(params, columns=list(names))
+    surface[list(SCORE_COLUMNS)] = scores
+    best_params, best_sharpe = best_of(names, params, scores[:, 0])
+    return best_params, best_sharpe, surface
+
+
+def best_of(names, params, scores):
+    """Pick the first highest-scoring parameter set; NaN scores never win"""
+    ranked = np.where(np.isnan(scores), -np.inf, scores)
+    if len(ranked) == 0 or not np.isfinite(ranked).any():
+        return {}, -np.inf
+    best = int(np.argmax(ranked))
+    return {name: _plain(value) for name, value in zip(names, params[best])}, float(scores[best])
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from optimization.grid import STRATEGIES, close_prices, grid_search, score_params, search_result
+from profiling.profiler import profiled
+
+# Below this many (parameter set x bar) evaluations a process pool costs more
+# to start than it saves, so the serial engine is used instead
+MIN_PARALLEL_WORK = 2_000_000
+
+# Workers are started from a clean server process rather than forked from the
+# caller: a fork inside the multi-threaded dashboard could copy a lock (the
+# indicator cache's, the profiler's) held by another thread and deadlock, and
+# would inherit an active tracemalloc. Spawn where forkserver is unavailable.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Worker-side view of the shared Close array, set up once per process
+_shared = {}
+
+
+def default_workers():
+    """Number of worker processes to use when none is configured"""
+    return os.cpu_count() or 1
+
+
+def _attach(name, length):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["close"] = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+
+
+def _score_chunk(score_func, strategy_name, start, params, kwargs):
+    return start, score_func(strategy_name, _shared["close"], params, **kwargs)
+
+
+@profiled("optimize")
+def parallel_grid_search(strategy_name, data, workers=None, chunk_size=None, risk_free_rate=0.02,
+                         params=None, progress=None, min_work=MIN_PARALLEL_WORK, commission=0.0):
+    """
+    Grid search spread across a process pool.
+    The Close series is copied once into shared memory and every worker maps
+    it instead of receiving a pickled copy; only parameter chunks and score
+    arrays cross process boundaries. Scores are reassembled in grid order, so
+    the best parameters (including tie-breaking) match grid_search exactly.
+    Falls back to the serial engine for a single worker, for grids too small
+    to amortize pool start-up, or when shared memory or a process pool is
+    unavailable on the host.
+    `progress` is called as progress(done, total) as chunks complete.
+    Scores are net of `commission` per change in position.
+    """
+    names, grid_func, _ = STRATEGIES[strategy_name]
+    params = grid_func() if params is None else list(params)
+    close = close_prices(data)
+    workers = default_workers() if workers is None else max(1, int(workers))
+
+    if workers == 1 or len(params) * len(close) < min_work:
+        return grid_search(strategy_name, data, risk_free_rate, params, progress=progress, commission=commission)
+
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool balanced without flooding it with tiny tasks
+        chunk_size = max(1, -(-len(params) // (workers * 4)))
+
+    try:
+        scores = _pool_scores(score_params, strategy_name, close, params, workers, chunk_size, progress,
+                              risk_free_rate=risk_free_rate, commission=commission)
+    except OSError:
+        # No usable shared memory or semaphores (e.g. a locked-down container)
+        return grid_search(strategy_name, data, risk_free_rate, params, progress=progress, commission=commission)
+
+    return search_result(names, params, scores)
+
+
+def _pool_scores(score_func, strategy_name, close, params, workers, chunk_size, progress=None, **kwargs):
+    """
+    Run score_func(strategy_name, close, chunk, **kwargs), a module-level
+    function returning one row per parameter set, over chunks of `params`
+    on a process pool sharing `close`. Returns the rows in `params` order.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=np.float64, buffer=shm.buf)[:] = close
+        scores = None
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD),
+                                 initializer=_attach, initargs=(shm.name, len(close))) as pool:
+            futures = [
+                pool.submit(_score_chunk, score_func, strategy_name, start, params[start:start + chunk_size], kwargs)
+                for start in range(0, len(params), chunk_size)
+            ]
+            for future in as_completed(futures):
+                start, chunk_scores = future.result()
+                if scores is None:
+                    scores = np.empty((len(params),) + chunk_scores.shape[1:])
+                scores[start:start + len(chunk_scores)] = chunk_scores
+                done += len(chunk_scores)
+                if progress is not None:
+                    progress(done, len(params))
+        return scores
+    finally:
+        shm.close()
+        shm.unlink()
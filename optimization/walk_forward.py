@@ -0,0 +1,143 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from metrics.performance import performance_metrics
+from optimization.grid import STRATEGIES, TRADING_DAYS, best_of, close_prices, strategy_returns
+from optimization.parallel import MIN_PARALLEL_WORK, _pool_scores, default_workers
+from profiling.profiler import profiled
+
+WalkForwardResult = namedtuple("WalkForwardResult", ["folds", "returns", "equity", "metrics"])
+
+# Training-window returns stacked into one block per performance_metrics() call
+FOLD_BLOCK_VALUES = 1 << 21
+
+
+def walk_forward_schedule(n_bars, train_size, test_size, anchored=False):
+    """
+    Train/test windows as (train_start, train_end, test_start, test_end) bar
+    offsets, end-exclusive. Test windows are consecutive and non-overlapping;
+    a rolling schedule slides a fixed-size training window in front of each,
+    an anchored one always trains from the first bar. The last test window
+    may be shorter than `test_size`.
+    """
+    folds = []
+    test_start = train_size
+    while test_start < n_bars:
+        test_end = min(test_start + test_size, n_bars)
+        train_start = 0 if anchored else test_start - train_size
+        folds.append((train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return folds
+
+
+def train_sharpes(returns, schedule, risk_free_rate=0.02, max_values=FOLD_BLOCK_VALUES):
+    """
+    (folds, sets) Sharpe ratios of every column of a (bars, sets) returns
+    block over the training window of every fold, as scored by
+    performance_metrics(). The windows of many folds are stacked side by
+    side into one block, shorter ones padded with NaN (skipped like any NaN
+    bar), and scored at once, so the result equals scoring each window on
+    its own. At most about `max_values` returns are stacked at once.
+    """
+    starts = np.array([train_start for train_start, _, _, _ in schedule])
+    lengths = np.array([train_end - train_start for train_start, train_end, _, _ in schedule])
+    sets = returns.shape[1]
+    sharpe = np.empty((len(schedule), sets))
+    group = max(1, max_values // max(int(lengths.max(initial=1)) * sets, 1))
+    for first in range(0, len(schedule), group):
+        folds = slice(first, first + group)
+        offsets = np.arange(lengths[folds].max())[:, None]
+        inside = offsets < lengths[folds]
+        # (bars, folds, sets), flattened to one column per fold and set
+        block = returns[np.where(inside, starts[folds] + offsets, 0)]
+        block[~inside] = np.nan
+        block = block.reshape(len(offsets), -1)
+        scores = performance_metrics(block, risk_free_rate, TRADING_DAYS)["sharpe"]
+        sharpe[folds] = scores.reshape(-1, sets)
+    return sharpe
+
+
+def fold_scores(strategy_name, close, params, schedule=(), risk_free_rate=0.02, commission=0.0):
+    """(len(params), folds) training Sharpe ratios of each parameter set, net of `commission`"""
+    _, _, signal_func = STRATEGIES[strategy_name]
+    returns = strategy_returns(close, signal_func(close, params), commission=commission)
+    return train_sharpes(returns, schedule, risk_free_rate).T
+
+
+@profiled("optimize")
+def walk_forward(strategy_name, data, train_size=504, test_size=126, anchored=False, workers=None,
+                 risk_free_rate=0.02, initial_capital=100000, chunk_size=64, progress=None, commission=0.0,
+                 min_work=MIN_PARALLEL_WORK):
+    """
+    Walk-forward optimization: pick the best grid parameters on each training
+    window by Sharpe ratio, trade them on the following test window, and join
+    the out-of-sample returns into one equity curve. Returns are net of
+    `commission` on every change in position, as in grid_search().
+    Signals (and so every indicator) are computed once over the full series
+    and sliced per fold; rolling windows only look back, so this adds no
+    look-ahead and lets each fold warm up on earlier bars. Every fold of a
+    chunk of parameter sets is scored at once (see train_sharpes()).
+    Parameter sets are processed in chunks of at most `chunk_size` to keep
+    memory bounded; with more than one worker and at least `min_work`
+    (parameter set x bar) evaluations, chunks are spread across the process
+    pool of parallel_grid_search(), falling back to one process where no
+    pool is available. `progress` is called as progress(done, total) after
+    each chunk.
+    """
+    names, grid_func, signal_func = STRATEGIES[strategy_name]
+    params = grid_func()
+    close = close_prices(data)
+    dates = pd.Index(data.index[1:])
+    # Offsets below refer to rows of the strategy returns, i.e. bars 1..n-1
+    schedule = walk_forward_schedule(len(close) - 1, train_size, test_size, anchored)
+    if not schedule:
+        raise ValueError(f"Need more than {train_size + 1} bars for a {train_size}-bar training window")
+
+    workers = default_workers() if workers is None else max(1, int(workers))
+    scores = None
+    if workers > 1 and len(params) * len(close) >= min_work:
+        # A few chunks per worker keeps the pool balanced
+        pool_chunk = max(1, min(chunk_size, -(-len(params) // (workers * 4))))
+        try:
+            scores = _pool_scores(fold_scores, strategy_name, close, params, workers, pool_chunk, progress,
+                                  schedule=schedule, risk_free_rate=risk_free_rate, commission=commission)
+        except OSError:
+            # No usable shared memory or semaphores (e.g. a locked-down container)
+            scores = None
+    if scores is None:
+        scores = np.empty((len(params), len(schedule)))
+        for start in range(0, len(params), chunk_size):
+            chunk = params[start:start + chunk_size]
+            scores[start:start + len(chunk)] = fold_scores(strategy_name, close, chunk, schedule, risk_free_rate,
+                                                           commission)
+            if progress is not None:
+                progress(start + len(chunk), len(params))
+
+    rows = []
+    oos_returns = []
+    for fold, (train_start, train_end, test_start, test_end) in enumerate(schedule):
+        best_params, train_sharpe = best_of(names, params, scores[:, fold])
+        if best_params:
+            best = tuple(best_params[name] for name in names)
+            test_returns = strategy_returns(close, signal_func(close, [best]), commission=commission)
+            test_returns = test_returns[test_start:test_end, 0]
+        else:
+            test_returns = np.zeros(test_end - test_start)
+        oos_returns.append(test_returns)
+        rows.append({
+            "Train_Start": dates[train_start],
+            "Train_End": dates[train_end - 1],
+            "Test_Start": dates[test_start],
+            "Test_End": dates[test_end - 1],
+            **best_params,
+            "Train_Sharpe": train_sharpe,
+            "Test_Sharpe": performance_metrics(test_returns, risk_free_rate, TRADING_DAYS)["sharpe"],
+        })
+
+    first_test = schedule[0][2]
+    returns = pd.Series(np.concatenate(oos_returns), index=dates[first_test:], name="Strategy_Returns")
+    equity = ((1 + returns).cumprod() * initial_capital).rename("Portfolio")
+    metrics = performance_metrics(returns.to_numpy(), risk_free_rate, TRADING_DAYS)
+    return WalkForwardResult(pd.DataFrame(rows), returns, equity, metrics)
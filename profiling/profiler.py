@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+# Pipeline stages in the order reports list them; any other name is listed after
+STAGES = ("load", "indicators", "signals", "backtest", "metrics", "plotting", "optimize")
+
+_ACTIVE = ContextVar("profiler", default=None)
+_DISABLED = nullcontext({})
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+# Open memory-tracked stages of every profiler in every thread, by id
+_open_stages = {}
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class Profiler:
+    """
+    Records the wall time, rows processed and peak memory of each pipeline
+    stage run while it is active (see profiling() and activate()).
+    Peak memory is the highest traced allocation above the stage's starting
+    point, via tracemalloc, which slows allocations down; pass memory=False
+    to record times and rows only. tracemalloc traces the whole process, so
+    allocations of other threads during a stage count towards its peak.
+    Its one peak counter is shared safely, though: before a stage resets
+    it, the peak so far is credited to every open stage of every profiler.
+    Tracing stops once the last memory profiler is closed or garbage
+    collected. Times are inclusive: a signals stage
+    contains the indicators it computed. A stage run inside a stage of the
+    same name is folded into the outer one. At most `max_events` events are
+    kept; later ones are counted in `dropped`.
+    """
+
+    def __init__(self, memory=True, max_events=100_000):
+        self.memory = memory
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._stack = []
+        # Runs _stop_tracing() once, on close() or when the profiler is garbage collected
+        self._tracing = None
+        if memory:
+            _start_tracing()
+            self._tracing = weakref.finalize(self, _stop_tracing)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the enclosed block as stage `name`; yields the event dict, whose rows may be set inside"""
+        if any(event["name"] == name for event in self._stack):
+            yield {}
+            return
+
+        event = {"name": name, "rows": rows, "depth": len(self._stack), "peak_bytes": None}
+        if self.memory and tracemalloc.is_tracing():
+            with _tracing_lock:
+                current, peak = tracemalloc.get_traced_memory()
+                for other in _open_stages.values():
+                    other["_peak"] = max(other["_peak"], peak)
+                tracemalloc.reset_peak()
+                event["_base"], event["_peak"] = current, current
+                _open_stages[id(event)] = event
+        self._stack.append(event)
+        started = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event["seconds"] = time.perf_counter() - started
+            event["start"] = started - self.origin
+            self._stack.pop()
+            if "_base" in event:
+                with _tracing_lock:
+                    del _open_stages[id(event)]
+                    peak = max(event.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                event["peak_bytes"] = peak - event.pop("_base")
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    def close(self):
+        """Stop memory tracing for this profiler; recorded events are kept"""
+        if self._tracing is not None:
+            self._tracing()
+
+    def summary(self):
+        """
+        One row per stage: calls, total seconds, rows processed and the
+        highest peak memory of any call, in STAGES order.
+        """
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event["name"], {"stage": event["name"], "calls": 0, "seconds": 0.0,
+                                                   "rows": 0, "peak_bytes": None})
+            row["calls"] += 1
+            row["seconds"] += event["seconds"]
+            row["rows"] += event["rows"] or 0
+            if event["peak_bytes"] is not None:
+                row["peak_bytes"] = max(row["peak_bytes"] or 0, event["peak_bytes"])
+        order = {name: i for i, name in enumerate(STAGES)}
+        return sorted(rows.values(), key=lambda row: order.get(row["stage"], len(order)))
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.summary(), columns=["stage", "calls", "seconds", "rows", "peak_bytes"])
+
+    def report(self):
+        """Plain-text table of summary()"""
+        lines = [f"{'Stage':<12} {'Calls':>7} {'Time (ms)':>12} {'Rows':>14} {'Peak (MB)':>10}"]
+        for row in self.summary():
+            peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 1e6:.1f}"
+            lines.append(f"{row['stage']:<12} {row['calls']:>7} {row['seconds'] * 1000:>12.2f} "
+                         f"{row['rows']:>14,} {peak:>10}")
+        return "\n".join(lines)
+
+    def trace(self):
+        """Events in the Chrome trace format, viewable in chrome://tracing or Perfetto"""
+        return {
+            "traceEvents": [
+                {
+                    "name": event["name"],
+                    "ph": "X",
+                    "ts": event["start"] * 1e6,
+                    "dur": event["seconds"] * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                    "args": {"rows": event["rows"], "peak_bytes": event["peak_bytes"]},
+                }
+                for event in self.events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
+
+
+def activate(profiler):
+    """
+    Make `profiler` (or None, to disable profiling) the active profiler of
+    the current thread or task, closing the one it replaces. Returns
+    `profiler`. Only profilers activated in the same context are closed,
+    and nothing is closed if the caller never gets to activate(None), so
+    prefer profiling() wherever a with-block fits.
+    """
+    previous = _ACTIVE.get()
+    if previous is not None and previous is not profiler:
+        previous.close()
+    _ACTIVE.set(profiler)
+    return profiler
+
+
+@contextmanager
+def profiling(memory=True):
+    """Profile the pipeline stages run inside the with-block; yields the Profiler"""
+    profiler = Profiler(memory)
+    token = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(token)
+        profiler.close()
+
+
+def stage(name, rows=None):
+    """Context manager timing a stage on the active profiler, or doing nothing when none is active"""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return _DISABLED
+    return profiler.stage(name, rows)
+
+
+def _rows(args, result):
+    # Rows of the first sized argument (the data being processed), else of the result
+    for value in (*args, result):
+        if isinstance(value, (str, bytes, dict)):
+            continue
+        try:
+            return len(value)
+        except TypeError:
+            continue
+    return None
+
+
+def profiled(name):
+    """
+    Decorator recording every call of the function as stage `name`, with
+    the length of its first sized argument (or of its result) as rows.
+    Without an active profiler it costs one context variable lookup.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _ACTIVE.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name) as event:
+                result = func(*args, **kwargs)
+                event["rows"] = _rows(args, result)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from profiling.profiler import profiled
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class IndicatorCache:
+    """
+    Memoizes indicator arrays keyed by (data fingerprint, indicator, window).
+    Entries are evicted least-recently-used once their total size exceeds
+    `max_bytes`. Cached arrays are read-only so callers cannot corrupt them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, key):
+        """Cached value for `key`, or None; counts a hit or a miss"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def store(self, key, value):
+        """Cache `value` under `key`, evicting old entries to stay within budget"""
+        value = np.asarray(value)
+        value.flags.writeable = False
+        if value.nbytes > self.max_bytes:
+            return value
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key).nbytes
+            self.entries[key] = value
+            self.bytes += value.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+        return value
+
+    def get(self, key, compute):
+        """Cached value for `key`, computing and storing it on a miss"""
+        value = self.lookup(key)
+        if value is None:
+            value = self.store(key, compute())
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+
+INDICATOR_CACHE = IndicatorCache()
+
+
+def fingerprint(values):
+    """Content hash of a price series, used as the data part of cache keys"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    digest = hashlib.blake2b(memoryview(values).cast("B"), digest_size=16)
+    return f"{len(values)}:{digest.hexdigest()}"
+
+
+def _values(close):
+    return np.asarray(close, dtype=np.float64).reshape(-1)
+
+
+@profiled("indicators")
+def sma(close, window, data_key=None, cache=INDICATOR_CACHE):
+    """
+    Simple moving average of a close series as an array (NaN until the window fills).
+    Pass a precomputed `data_key` (see fingerprint()) to skip rehashing the
+    series when many windows are requested for the same data; the same
+    applies to rsi() and momentum().
+    """
+    values = _values(close)
+    return cache.get(
+        (data_key or fingerprint(values), "sma", window),
+        lambda: pd.Series(values).rolling(window=window).mean().to_numpy(),
+    )
+
+
+@profiled("indicators")
+def rsi(close, window=14, data_key=None, cache=INDICATOR_CACHE):
+    """Relative strength index of a close series as an array"""
+    values = _values(close)
+
+    def compute():
+        delta = pd.Series(values).diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+
+        avg_gain = gain.rolling(window).mean()
+        avg_loss = loss.rolling(window).mean()
+
+        rs = avg_gain / avg_loss
+        return (100 - (100 / (1 + rs))).to_numpy()
+
+    return cache.get((data_key or fingerprint(values), "rsi", window), compute)
+
+
+@profiled("indicators")
+def momentum(close, lookback_period=20, data_key=None, cache=INDICATOR_CACHE):
+    """Rate of change over `lookback_period` bars as an array"""
+    values = _values(close)
+
+    def compute():
+        series = pd.Series(values)
+        past = series.shift(lookback_period)
+        return ((series - past) / past).to_numpy()
+
+    return cache.get((data_key or fingerprint(values), "momentum", lookback_period), compute)
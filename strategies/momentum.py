@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
+from strategies.indicators import momentum
+from profiling.profiler import profiled
 
+@profiled("signals")
 def momentum_strategy(data, lookback_period=20, threshold=0.0):
     """
     Momentum strategy based on price momentum.
@@ -9,11 +13,19 @@ def momentum_strategy(data, lookback_period=20, threshold=0.0):
     df = data.copy()
 
     # Calculate momentum
-    df["Momentum"] = (df["Close"] - df["Close"].shift(lookback_period)) / df["Close"].shift(lookback_period)
+    df["Momentum"] = momentum(df["Close"], lookback_period)
 
     # Generate signals
     df["Signal"] = 0
     df.loc[df["Momentum"] > threshold, "Signal"] = 1
     df.loc[df["Momentum"] < -threshold, "Signal"] = -1
 
-    return df
\ No newline at end of file
+    return df
+
+@profiled("signals")
+def momentum_signals(close, lookback_period=20, threshold=0.0):
+    """Array-only momentum strategy: returns the Momentum and int8 Signal columns"""
+    values = momentum(close, lookback_period)
+    signal = (values > threshold).astype(np.int8)
+    signal[values < -threshold] = -1
+    return {"Momentum": values, "Signal": signal}
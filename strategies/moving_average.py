@@ -1,13 +1,25 @@
+import numpy as np
 import pandas as pd
+from strategies.indicators import sma
+from profiling.profiler import profiled
 
+@profiled("signals")
 def moving_average_strategy(data, short_window=20, long_window=50):
     df = data.copy()
 
-    df["Short_MA"] = df["Close"].rolling(window=short_window).mean()
-    df["Long_MA"] = df["Close"].rolling(window=long_window).mean()
+    df["Short_MA"] = sma(df["Close"], short_window)
+    df["Long_MA"] = sma(df["Close"], long_window)
 
     df["Signal"] = 0
     df.loc[df["Short_MA"] > df["Long_MA"], "Signal"] = 1
     df.loc[df["Short_MA"] < df["Long_MA"], "Signal"] = -1
 
     return df
+
+@profiled("signals")
+def moving_average_signals(close, short_window=20, long_window=50):
+    """Array-only MA crossover: returns the Short_MA, Long_MA and int8 Signal columns"""
+    short_ma = sma(close, short_window)
+    long_ma = sma(close, long_window)
+    signal = (short_ma > long_ma).astype(np.int8) - (short_ma < long_ma).astype(np.int8)
+    return {"Short_MA": short_ma, "Long_MA": long_ma, "Signal": signal}
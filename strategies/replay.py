@@ -0,0 +1,52 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from strategies.streaming import STREAMING_STRATEGIES
+
+
+def load_bars(path, column="Close"):
+    """
+    Read the close series of a stored bar file.
+    `.npy` files are memory-mapped; anything else is read as CSV.
+    """
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return pd.read_csv(path, usecols=[column])[column].to_numpy(dtype=np.float64)
+
+
+def replay(closes, strategy, block_size=65536):
+    """
+    Feed `closes` through a streaming strategy bar by bar as fast as possible.
+    Bars are converted to Python floats one block at a time, so a
+    memory-mapped file is never materialized in full.
+    Returns (signals, bars_per_second).
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    signals = np.empty(len(closes), dtype=np.int8)
+    update = strategy.update
+    started = time.perf_counter()
+    for start in range(0, len(closes), block_size):
+        block = closes[start:start + block_size].tolist()
+        signals[start:start + len(block)] = [update(close) for close in block]
+    elapsed = time.perf_counter() - started
+    return signals, len(signals) / elapsed if elapsed > 0 else float("inf")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a stored bar file through a streaming strategy")
+    parser.add_argument("path", help="Bar file (.csv with a Close column, or .npy of closes)")
+    parser.add_argument("--strategy", default="Moving Average Crossover", choices=list(STREAMING_STRATEGIES))
+    parser.add_argument("--column", default="Close", help="Price column to replay from a CSV file")
+    args = parser.parse_args(argv)
+
+    closes = load_bars(args.path, args.column)
+    signals, rate = replay(closes, STREAMING_STRATEGIES[args.strategy]())
+    print(f"Replayed {len(signals):,} bars at {rate:,.0f} bars/s")
+    print(f"Signals: {int((signals == 1).sum()):,} buy, {int((signals == -1).sum()):,} sell")
+
+
+if __name__ == "__main__":
+    main()
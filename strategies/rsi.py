@@ -1,18 +1,12 @@
+import numpy as np
 import pandas as pd
+from strategies import indicators
+from profiling.profiler import profiled
 
 def calculate_rsi(data, window=14):
-    delta = data["Close"].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window).mean()
-    avg_loss = loss.rolling(window).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi
+    return pd.Series(indicators.rsi(data["Close"], window), index=data.index, copy=True)
 
+@profiled("signals")
 def rsi_strategy(data, rsi_period=14, overbought=70, oversold=30):
     df = data.copy()
     df["RSI"] = calculate_rsi(df, rsi_period)
@@ -22,3 +16,11 @@ def rsi_strategy(data, rsi_period=14, overbought=70, oversold=30):
     df.loc[df["RSI"] > overbought, "Signal"] = -1
 
     return df
+
+@profiled("signals")
+def rsi_signals(close, rsi_period=14, overbought=70, oversold=30):
+    """Array-only RSI strategy: returns the RSI and int8 Signal columns"""
+    rsi = indicators.rsi(close, rsi_period)
+    signal = (rsi < oversold).astype(np.int8)
+    signal[rsi > overbought] = -1
+    return {"RSI": rsi, "Signal": signal}
@@ -0,0 +1,274 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RollingMean:
+    """
+    Rolling mean updated in O(1) per value with O(window) state.
+    Uses the same compensated add/remove summation as pandas'
+    rolling(window).mean(), so a streamed series matches the batch result.
+    As in pandas, NaN values are left out of the sum, and the mean is NaN
+    until the window holds `window` valid values again.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.valid = 0
+        self.total = 0.0
+        self.add_compensation = 0.0
+        self.remove_compensation = 0.0
+        self.negatives = 0
+        self.repeats = 0
+        self.previous = math.nan
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self._add(value)
+        self.values.append(value)
+        return self.value
+
+    def update_block(self, values):
+        """
+        update() over a list of floats, returning the means as an array.
+        Same arithmetic as update(), run on local variables so long blocks
+        avoid per-value method calls.
+        """
+        window = self.window
+        history = list(self.values) + values
+        valid = self.valid
+        total = self.total
+        add_compensation = self.add_compensation
+        remove_compensation = self.remove_compensation
+        negatives = self.negatives
+        repeats = self.repeats
+        previous = self.previous
+        copysign = math.copysign
+        count = len(self.values)
+        nan = math.nan
+        means = []
+        append = means.append
+
+        for i in range(count, len(history)):
+            value = history[i]
+            if count == window:
+                removed = history[i - window]
+                if removed == removed:
+                    valid -= 1
+                    y = -removed - remove_compensation
+                    t = total + y
+                    remove_compensation = t - total - y
+                    total = t
+                    if copysign(1.0, removed) < 0:
+                        negatives -= 1
+            else:
+                count += 1
+
+            if value == value:
+                valid += 1
+                y = value - add_compensation
+                t = total + y
+                add_compensation = t - total - y
+                total = t
+                if copysign(1.0, value) < 0:
+                    negatives += 1
+                repeats = repeats + 1 if value == previous else 1
+                previous = value
+
+            if valid < window:
+                append(nan)
+            elif repeats >= valid:
+                append(previous)
+            else:
+                mean = total / valid
+                if negatives == 0 and mean < 0:
+                    mean = 0.0
+                elif negatives == valid and mean > 0:
+                    mean = 0.0
+                append(mean)
+
+        self.values = deque(history[len(history) - count:])
+        self.valid = valid
+        self.total = total
+        self.add_compensation = add_compensation
+        self.remove_compensation = remove_compensation
+        self.negatives = negatives
+        self.repeats = repeats
+        self.previous = previous
+        return np.array(means, dtype=np.float64)
+
+    def _add(self, value):
+        # NaN (the only value unequal to itself) is skipped, as in pandas
+        if value != value:
+            return
+        self.valid += 1
+        y = value - self.add_compensation
+        t = self.total + y
+        self.add_compensation = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self.negatives += 1
+        self.repeats = self.repeats + 1 if value == self.previous else 1
+        self.previous = value
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.valid -= 1
+        y = -value - self.remove_compensation
+        t = self.total + y
+        self.remove_compensation = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self.negatives -= 1
+
+    @property
+    def value(self):
+        valid = self.valid
+        if valid < self.window:
+            return math.nan
+        if self.repeats >= valid:
+            return self.previous
+        mean = self.total / valid
+        if self.negatives == 0 and mean < 0:
+            return 0.0
+        if self.negatives == valid and mean > 0:
+            return 0.0
+        return mean
+
+
+class StreamingMAStrategy:
+    """Bar-by-bar moving average crossover, matching moving_average_strategy()"""
+
+    def __init__(self, short_window=20, long_window=50):
+        self.short_ma = RollingMean(short_window)
+        self.long_ma = RollingMean(long_window)
+
+    def update(self, close):
+        short_ma = self.short_ma.update(close)
+        long_ma = self.long_ma.update(close)
+        if short_ma > long_ma:
+            return 1
+        if short_ma < long_ma:
+            return -1
+        return 0
+
+    def update_block(self, closes):
+        """Feed an array of closes; returns the Short_MA, Long_MA and int8 Signal columns"""
+        values = np.asarray(closes, dtype=np.float64).tolist()
+        short_ma = self.short_ma.update_block(values)
+        long_ma = self.long_ma.update_block(values)
+        signal = (short_ma > long_ma).astype(np.int8) - (short_ma < long_ma).astype(np.int8)
+        return {"Short_MA": short_ma, "Long_MA": long_ma, "Signal": signal}
+
+
+class StreamingRSI:
+    """Bar-by-bar RSI, matching calculate_rsi()"""
+
+    def __init__(self, window=14):
+        self.avg_gain = RollingMean(window)
+        self.avg_loss = RollingMean(window)
+        self.previous_close = None
+
+    def update(self, close):
+        delta = 0.0 if self.previous_close is None else close - self.previous_close
+        self.previous_close = close
+        avg_gain = self.avg_gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self.avg_loss.update(-delta if delta < 0 else 0.0)
+
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return math.nan
+        if avg_loss == 0:
+            # x/0 is inf (RSI 100) and 0/0 is undefined, as in pandas
+            return 100.0 if avg_gain > 0 else math.nan
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def update_block(self, closes):
+        """Feed an array of closes; returns their RSI values as an array"""
+        closes = np.asarray(closes, dtype=np.float64)
+        if not len(closes):
+            return np.empty(0)
+        delta = np.empty(len(closes))
+        delta[0] = 0.0 if self.previous_close is None else closes[0] - self.previous_close
+        np.subtract(closes[1:], closes[:-1], out=delta[1:])
+        self.previous_close = float(closes[-1])
+
+        avg_gain = self.avg_gain.update_block(np.where(delta > 0, delta, 0.0).tolist())
+        avg_loss = self.avg_loss.update_block(np.where(delta < 0, -delta, 0.0).tolist())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class StreamingRSIStrategy:
+    """Bar-by-bar RSI strategy, matching rsi_strategy()"""
+
+    def __init__(self, rsi_period=14, overbought=70, oversold=30):
+        self.rsi = StreamingRSI(rsi_period)
+        self.overbought = overbought
+        self.oversold = oversold
+
+    def update(self, close):
+        rsi = self.rsi.update(close)
+        if rsi > self.overbought:
+            return -1
+        if rsi < self.oversold:
+            return 1
+        return 0
+
+    def update_block(self, closes):
+        """Feed an array of closes; returns the RSI and int8 Signal columns"""
+        rsi = self.rsi.update_block(closes)
+        signal = (rsi < self.oversold).astype(np.int8)
+        signal[rsi > self.overbought] = -1
+        return {"RSI": rsi, "Signal": signal}
+
+
+class StreamingMomentumStrategy:
+    """Bar-by-bar momentum strategy, matching momentum_strategy()"""
+
+    def __init__(self, lookback_period=20, threshold=0.0):
+        self.closes = deque(maxlen=lookback_period + 1)
+        self.threshold = threshold
+        self.momentum = math.nan
+
+    def update(self, close):
+        self.closes.append(close)
+        if len(self.closes) < self.closes.maxlen:
+            return 0
+        past = self.closes[0]
+        if past != 0:
+            self.momentum = (close - past) / past
+        else:
+            self.momentum = math.nan if close == past else math.copysign(math.inf, close - past)
+        if self.momentum < -self.threshold:
+            return -1
+        if self.momentum > self.threshold:
+            return 1
+        return 0
+
+    def update_block(self, closes):
+        """Feed an array of closes; returns the Momentum and int8 Signal columns"""
+        closes = np.asarray(closes, dtype=np.float64)
+        lookback = self.closes.maxlen - 1
+        earlier = np.array(self.closes, dtype=np.float64)[-lookback:] if lookback else np.empty(0)
+        history = np.concatenate((np.full(lookback - len(earlier), np.nan), earlier, closes))
+        past = history[:len(closes)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = (closes - past) / past
+        self.closes.extend(closes[-self.closes.maxlen:].tolist())
+        if len(values):
+            self.momentum = float(values[-1])
+
+        signal = (values > self.threshold).astype(np.int8)
+        signal[values < -self.threshold] = -1
+        return {"Momentum": values, "Signal": signal}
+
+
+STREAMING_STRATEGIES = {
+    "Moving Average Crossover": StreamingMAStrategy,
+    "RSI Strategy": StreamingRSIStrategy,
+    "Momentum Strategy": StreamingMomentumStrategy,
+}
@@ -1,11 +1,23 @@
-import matplotlib.pyplot as plt
+from profiling.profiler import profiled
+from visuals.render import FIGURE_CACHE, cached_figure, new_figure, pixel_width, plot_lines, sample_indices
 
-def plot_equity_curve(df, filename="equity_curve.png"):
-    fig, ax = plt.subplots(figsize=(10,5))
-    ax.plot(df["Portfolio"], label="Portfolio Value")
-    ax.set_title("Equity Curve (Backtest Result)")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Portfolio Value")
-    ax.legend()
-    plt.savefig(f"images/{filename}")
-    return fig
+FIGSIZE = (10, 5)
+
+@profiled("plotting")
+def plot_equity_curve(df, filename=None, width=None, cache=FIGURE_CACHE):
+    """
+    Portfolio value over time, downsampled to about `width` pixels (the
+    figure width by default). Saved under images/ only when a filename is
+    given.
+    """
+    def build(width):
+        fig, ax = new_figure(figsize=FIGSIZE)
+        rows = sample_indices(df, ["Portfolio"], width)
+        plot_lines(ax, df, rows, [("Portfolio", {"label": "Portfolio Value"})])
+        ax.set_title("Equity Curve (Backtest Result)")
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Portfolio Value")
+        ax.legend()
+        return fig
+
+    return cached_figure("equity_curve", df, ["Portfolio"], build, width or pixel_width(FIGSIZE), filename, cache)
@@ -1,26 +1,29 @@
-import matplotlib.pyplot as plt
-import os
+from profiling.profiler import profiled
+from visuals.render import (FIGURE_CACHE, cached_figure, new_figure, pixel_width, plot_lines,
+                            plot_signal_markers, sample_indices)
 
-def plot_ma_strategy(df):
-    # Ensure images folder exists
-    os.makedirs("images", exist_ok=True)
+FIGSIZE = (12, 6)
+COLUMNS = ["Close", "Short_MA", "Long_MA", "Signal"]
 
-    fig, ax = plt.subplots(figsize=(12,6))
-    ax.plot(df["Close"], label="Price", alpha=0.7)
-    ax.plot(df["Short_MA"], label="Short MA")
-    ax.plot(df["Long_MA"], label="Long MA")
+@profiled("plotting")
+def plot_ma_strategy(df, filename=None, width=None, cache=FIGURE_CACHE):
+    """
+    Price, both moving averages and the crossover signals, downsampled to
+    about `width` pixels (the figure width by default). Saved under images/
+    only when a filename is given.
+    """
+    def build(width):
+        fig, ax = new_figure(figsize=FIGSIZE)
+        rows = sample_indices(df, COLUMNS[:3], width)
+        plot_lines(ax, df, rows, [
+            ("Close", {"label": "Price", "alpha": 0.7}),
+            ("Short_MA", {"label": "Short MA"}),
+            ("Long_MA", {"label": "Long MA"}),
+        ])
+        plot_signal_markers(ax, df)
 
-    buy_signals = df[df["Signal"] == 1]
-    sell_signals = df[df["Signal"] == -1]
+        ax.set_title("Moving Average Crossover Strategy")
+        ax.legend()
+        return fig
 
-    ax.scatter(buy_signals.index, buy_signals["Close"],
-                marker="^", color="green", label="Buy", s=100)
-    ax.scatter(sell_signals.index, sell_signals["Close"],
-                marker="v", color="red", label="Sell", s=100)
-
-    ax.set_title("Moving Average Crossover Strategy")
-    ax.legend()
-
-    # SAVE IMAGE
-    plt.savefig("images/ma_strategy.png", bbox_inches="tight")
-    return fig
+    return cached_figure("ma_strategy", df, COLUMNS, build, width or pixel_width(FIGSIZE), filename, cache)
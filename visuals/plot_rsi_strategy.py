@@ -1,33 +1,33 @@
-import matplotlib.pyplot as plt
-import os
-
-def plot_rsi_strategy(df):
-    # Ensure images folder exists
-    os.makedirs("images", exist_ok=True)
-
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12,8), sharex=True)
-
-    # Price plot
-    ax1.plot(df["Close"], label="Price", alpha=0.7)
-
-    buy_signals = df[df["Signal"] == 1]
-    sell_signals = df[df["Signal"] == -1]
-
-    ax1.scatter(buy_signals.index, buy_signals["Close"],
-                marker="^", color="green", label="Buy", s=100)
-    ax1.scatter(sell_signals.index, sell_signals["Close"],
-                marker="v", color="red", label="Sell", s=100)
-
-    ax1.set_title("RSI Strategy")
-    ax1.legend()
-
-    # RSI plot
-    ax2.plot(df["RSI"], label="RSI", color="blue")
-    ax2.axhline(y=70, color="red", linestyle="--", label="Overbought")
-    ax2.axhline(y=30, color="green", linestyle="--", label="Oversold")
-    ax2.set_ylim(0, 100)
-    ax2.legend()
-
-    # SAVE IMAGE
-    plt.savefig("images/rsi_strategy.png", bbox_inches="tight")
-    return fig
\ No newline at end of file
+from profiling.profiler import profiled
+from visuals.render import (FIGURE_CACHE, cached_figure, new_figure, pixel_width, plot_lines,
+                            plot_signal_markers, sample_indices)
+
+FIGSIZE = (12, 8)
+COLUMNS = ["Close", "RSI", "Signal"]
+
+@profiled("plotting")
+def plot_rsi_strategy(df, filename=None, width=None, cache=FIGURE_CACHE):
+    """
+    Price with the RSI signals above the RSI and its thresholds, downsampled
+    to about `width` pixels (the figure width by default). Saved under
+    images/ only when a filename is given.
+    """
+    def build(width):
+        fig, (ax1, ax2) = new_figure(2, figsize=FIGSIZE)
+        rows = sample_indices(df, COLUMNS[:2], width)
+
+        # Price plot
+        plot_lines(ax1, df, rows, [("Close", {"label": "Price", "alpha": 0.7})])
+        plot_signal_markers(ax1, df)
+        ax1.set_title("RSI Strategy")
+        ax1.legend()
+
+        # RSI plot
+        plot_lines(ax2, df, rows, [("RSI", {"label": "RSI", "color": "blue"})])
+        ax2.axhline(y=70, color="red", linestyle="--", label="Overbought")
+        ax2.axhline(y=30, color="green", linestyle="--", label="Oversold")
+        ax2.set_ylim(0, 100)
+        ax2.legend()
+        return fig
+
+    return cached_figure("rsi_strategy", df, COLUMNS, build, width or pixel_width(FIGSIZE), filename, cache)
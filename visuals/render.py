@@ -0,0 +1,161 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import reduce
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.figure import Figure
+
+DEFAULT_MAX_FIGURES = 16
+
+
+class FigureCache:
+    """
+    Keeps the most recently used rendered figures, keyed by
+    (chart, data fingerprint, width), so reruns on an unchanged result skip
+    drawing entirely. At most `max_entries` figures are held. A cached
+    figure is shared by every caller (every Streamlit session), and drawing
+    a matplotlib figure is not thread-safe, so hold `render_lock` while
+    saving or displaying one.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_FIGURES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.render_lock = threading.RLock()
+
+    def get(self, key, build):
+        """Cached figure for `key`, calling build() and storing the result on a miss"""
+        with self.lock:
+            fig = self.entries.get(key)
+            if fig is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+        fig = build()
+        with self.lock:
+            self.entries[key] = fig
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+
+FIGURE_CACHE = FigureCache()
+
+
+def result_fingerprint(df, columns):
+    """Content hash of the index and the given columns of a result frame"""
+    digest = hashlib.blake2b(digest_size=16)
+    index = np.asarray(df.index)
+    if index.dtype.kind in "Mmiuf":
+        digest.update(np.ascontiguousarray(index).view(np.uint8))
+    else:
+        digest.update(repr(index.tolist()).encode())
+    for column in columns:
+        digest.update(column.encode())
+        digest.update(np.ascontiguousarray(df[column], dtype=np.float64).view(np.uint8))
+    return f"{len(index)}:{digest.hexdigest()}"
+
+
+def new_figure(nrows=1, figsize=(12, 6)):
+    """
+    Figure and axes that are not registered with pyplot, so they are freed
+    with their last reference instead of piling up until plt.close().
+    """
+    fig = Figure(figsize=figsize)
+    axes = fig.subplots(nrows, 1, sharex=True)
+    return fig, axes
+
+
+def pixel_width(figsize):
+    return int(figsize[0] * rcParams["figure.dpi"])
+
+
+def minmax_indices(values, n_buckets):
+    """
+    Indices of the first and last point and of the minimum and maximum of
+    each of `n_buckets` equal buckets. Drawing only these keeps every peak
+    and trough visible at a resolution of one bucket per pixel column.
+    NaNs are ignored unless a whole bucket is NaN.
+    """
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    buckets = np.full(n_buckets * size, np.nan)
+    buckets[:n] = values
+    buckets = buckets.reshape(n_buckets, size)
+    missing = np.isnan(buckets)
+    low = np.where(missing, np.inf, buckets).argmin(axis=1)
+    high = np.where(missing, -np.inf, buckets).argmax(axis=1)
+    offsets = np.arange(n_buckets) * size
+    indices = np.concatenate(([0, n - 1], offsets + low, offsets + high))
+    return np.unique(indices[indices < n])
+
+
+def sample_indices(df, columns, width):
+    """Rows to draw so that every column keeps its shape at `width` pixels"""
+    return reduce(np.union1d, (
+        minmax_indices(np.asarray(df[column], dtype=np.float64), width) for column in columns
+    ))
+
+
+def signal_changes(signal):
+    """Bars where the signal switches to long (buys) and to short (sells)"""
+    signal = np.asarray(signal)
+    if not len(signal):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    changed = np.flatnonzero(np.concatenate(([signal[0] != 0], signal[1:] != signal[:-1])))
+    return changed[signal[changed] == 1], changed[signal[changed] == -1]
+
+
+def plot_lines(ax, df, rows, lines):
+    """Draw (column, plot kwargs) pairs of df at the sampled rows"""
+    x = df.index[rows]
+    for column, kwargs in lines:
+        ax.plot(x, np.asarray(df[column])[rows], **kwargs)
+
+
+def plot_signal_markers(ax, df):
+    """Buy and sell markers only where the signal, and so the next position, changes"""
+    buys, sells = signal_changes(df["Signal"])
+    close = np.asarray(df["Close"])
+    ax.scatter(df.index[buys], close[buys], marker="^", color="green", label="Buy", s=100)
+    ax.scatter(df.index[sells], close[sells], marker="v", color="red", label="Sell", s=100)
+
+
+def save_figure(fig, filename, directory="images"):
+    """Write fig to directory/filename; a falsy filename writes nothing"""
+    if filename:
+        os.makedirs(directory, exist_ok=True)
+        fig.savefig(os.path.join(directory, filename), bbox_inches="tight")
+
+
+def cached_figure(chart, df, columns, build, width, filename=None, cache=FIGURE_CACHE):
+    """
+    build(width) for the given data, or the figure already rendered for the
+    same chart, data and width. `cache=None` always renders.
+    """
+    if cache is None:
+        fig = build(width)
+        save_figure(fig, filename)
+        return fig
+    key = (chart, result_fingerprint(df, columns), width)
+    fig = cache.get(key, lambda: build(width))
+    with cache.render_lock:
+        save_figure(fig, filename)
+    return fig